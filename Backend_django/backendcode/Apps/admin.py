@@ -12,6 +12,7 @@ from .models import (
     LoginHistory,
     UserRole
 )
+from .search import search_issues
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -40,7 +41,15 @@ class AdministratorAdmin(admin.ModelAdmin):
 class IssueAdmin(admin.ModelAdmin):
     list_display = ('title', 'student', 'status', 'reported_date', 'priority')
     list_filter = ('status', 'priority', 'category')
-    search_fields = ('title', 'description', 'student__username')
+    # Title/description are searched through the full text index instead
+    search_fields = ('student__username',)
+
+    def get_search_results(self, request, queryset, search_term):
+        by_username, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term:
+            return by_username, may_have_duplicates
+        matches = search_issues(queryset, search_term).values('id')
+        return by_username | queryset.filter(id__in=matches), may_have_duplicates
 
 @admin.register(Status)
 class StatusAdmin(admin.ModelAdmin):
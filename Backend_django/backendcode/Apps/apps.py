@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_issue_search(sender, using, **kwargs):
+    # Table rebuilds during SQLite migrations drop the FTS triggers, put them back
+    from django.db import connections
+    from .search import install_search_backend, sqlite_triggers_missing
+
+    conn = connections[using]
+    if conn.vendor == 'sqlite' and sqlite_triggers_missing(conn):
+        install_search_backend(conn)
 
 
 class AppsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Apps'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(ensure_issue_search, sender=self)
@@ -0,0 +1,223 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Value
+from django.db.models.functions import Upper
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User, UserRole, Student, Lecturer, Administrator
+
+# Finding the user behind a login, and behind each request's access token.
+#
+# At login, username and email are both accepted in any case; each is matched
+# through its UPPER() expression index (user_username_upper_idx,
+# user_email_upper_idx) instead of iexact, which no index can serve.
+#
+# Per request, CachedJWTAuthentication loads the user together with their role and
+# profiles in one query and keeps it in a small per-process cache, so most
+# requests authenticate without touching the database. Read-only endpoints go
+# further with ClaimsJWTAuthentication, which trusts the role and profile claims
+# that tokens.ClaimsRefreshToken puts in the access token and reads no user at all.
+
+# Everything views reach for on request.user
+USER_RELATIONS = ('role', 'student_profile', 'Lecturer_profile', 'admin_profile')
+# Profile kind as named in token claims, the relation on User and its model
+PROFILE_RELATIONS = (
+    ('student', 'student_profile', Student),
+    ('lecturer', 'Lecturer_profile', Lecturer),
+    ('admin', 'admin_profile', Administrator),
+)
+
+
+def login_candidates(login_input):
+    """Users whose username or email is login_input ignoring case, as two index probes"""
+    key = Upper(Value(login_input))
+    by_username = User.objects.annotate(login_key=Upper('username')).filter(login_key=key)
+    by_email = User.objects.annotate(login_key=Upper('email')).filter(login_key=key)
+    # UNION ALL: the branches are deduplicated below rather than with a sort
+    return by_username.union(by_email, all=True)
+
+
+def find_login_user(login_input):
+    """The user login_input names, or None if nobody or more than one user matches"""
+    users = {user.pk: user for user in login_candidates(login_input)}
+    if len(users) > 1:
+        # Usernames are only unique case-sensitively, so let an exact match decide
+        exact = [user for user in users.values() if login_input in (user.username, user.email)]
+        return exact[0] if len(exact) == 1 else None
+    return next(iter(users.values()), None)
+
+
+class UserCache:
+    """
+    Thread-safe LRU of authenticated users, keyed by (user id, token jti), whose
+    entries also expire AUTH_USER_CACHE_TTL seconds after they were loaded
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 10000)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires <= time.monotonic():
+                self.discard(key)
+                return None
+            self.entries.move_to_end(key)
+        # Each request gets its own copy to change as it likes
+        return copy.deepcopy(user)
+
+    def set(self, key, user):
+        if self.ttl <= 0:
+            return
+        user = copy.deepcopy(user)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, user)
+            self.entries.move_to_end(key)
+            self.keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self.entries) > self.max_size:
+                self.discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+        keys = self.keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[key[0]]
+
+    def invalidate(self, user_id=None):
+        """Forget one user, or everyone when user_id is None"""
+        with self.lock:
+            if user_id is None:
+                self.entries.clear()
+                self.keys_by_user.clear()
+                return
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self.discard(key)
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user with their role and profiles in one
+    query and caches the result per process. Saves to a user, their profile or a
+    role clear the cache in this process (see signals.py); other workers pick the
+    change up when their entry expires or the user's next token arrives. Writes
+    do not wait for that: they check is_active and the role against the database.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None or request.method in SAFE_METHODS:
+            return result
+        user, validated_token = result
+        current = User.objects.filter(pk=user.pk).values_list('is_active', 'role_id').first()
+        if current != (user.is_active, user.role.pk if user.role else None):
+            # Changed on another worker since it was cached or the token was issued
+            user_cache.invalidate(str(user.pk))
+            user = CachedJWTAuthentication.get_user(self, validated_token)
+        return user, validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = (str(user_id), validated_token.get(api_settings.JTI_CLAIM))
+        user = user_cache.get(key)
+        if user is None:
+            try:
+                user = User.objects.select_related(*USER_RELATIONS).get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(key, user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class ClaimsUser(TokenUser):
+    """
+    The user as described by their access token's claims. role and the profile
+    relations are unsaved stand-ins carrying only what the claims hold (ids and
+    names), so views can check them the same way as on a User.
+    """
+
+    def __getattr__(self, attr):
+        # TokenUser answers any unknown attribute with None, which would make
+        # hasattr(user, 'student_profile') true for every user
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attr}'")
+
+    @property
+    def role(self):
+        if self.token.get('role_id') is None:
+            return None
+        return UserRole(id=self.token['role_id'], role_name=self.token['role'], name=self.token.get('role_label'))
+
+    def claimed_profile(self, kind, model):
+        if self.token.get('profile') != kind:
+            raise AttributeError(f'User has no {kind} profile')
+        return model(id=self.token['profile_id'], user_id=self.pk)
+
+    @property
+    def student_profile(self):
+        return self.claimed_profile('student', Student)
+
+    @property
+    def Lecturer_profile(self):
+        return self.claimed_profile('lecturer', Lecturer)
+
+    @property
+    def admin_profile(self):
+        return self.claimed_profile('admin', Administrator)
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Stateless authentication for read-only endpoints: the user comes from the
+    access token's claims without a database read. The claims are re-read from the
+    database each time a token is refreshed, so a deactivated user or a changed
+    role is honoured within one ACCESS_TOKEN_LIFETIME. Tokens issued without
+    claims fall back to the cached lookup.
+    """
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return ClaimsUser(validated_token)
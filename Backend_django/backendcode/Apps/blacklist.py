@@ -0,0 +1,141 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+# Refresh-token blacklist checks from an in-process Bloom filter. Every refresh
+# rotates and blacklists the old token, so the blacklist only grows (until
+# manage.py purge_expired_tokens trims it). Each process keeps a Bloom filter of
+# blacklisted JTIs: a JTI the filter has never seen is not blacklisted as of the
+# last sync, and only the rare hit is confirmed with a query.
+#
+# The filter is kept current incrementally by BlacklistedToken id. Tokens this
+# process blacklists are added at once; those blacklisted by other workers are
+# picked up within BLACKLIST_FILTER_SYNC_MS. The default of 0 saves no queries:
+# every check still runs one, a primary key range scan for the rows above the
+# watermark in place of the join on jti, so that a rotated refresh token cannot
+# be replayed against another worker. Only a positive interval makes checks
+# query-free, at the price of a replay window that long.
+
+# A BlacklistedToken row can commit a little after its blacklisted_at. Rows younger
+# than this stay above the watermark, so they are read again on the next sync and
+# rows committed late behind them are not skipped.
+COMMIT_LAG = timedelta(seconds=5)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        # Every BlacklistedToken with an id up to here is in the filter
+        self.watermark = 0
+        # Ids above the watermark already in the filter
+        self.unsettled = set()
+        # Distinct BlacklistedToken rows in the filter, against its capacity
+        self.loaded = 0
+        self.synced_at = None
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, 'BLACKLIST_FILTER_SYNC_MS', 0) / 1000
+
+    @property
+    def capacity(self):
+        return getattr(settings, 'BLACKLIST_FILTER_CAPACITY', 100000)
+
+    @property
+    def error_rate(self):
+        return getattr(settings, 'BLACKLIST_FILTER_ERROR_RATE', 0.001)
+
+    def sync(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.bloom is not None and now - self.synced_at < self.sync_interval:
+                return
+            if self.bloom is None or self.loaded > self.bloom.capacity:
+                self.rebuild()
+            else:
+                self.load(BlacklistedToken.objects.filter(id__gt=self.watermark))
+            self.synced_at = now
+
+    def rebuild(self):
+        # Starting over drops the JTIs of tokens that have expired since, which
+        # no longer verify anyway
+        rows = list(self.rows(BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())))
+        self.bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        self.watermark = 0
+        self.unsettled = set()
+        self.loaded = 0
+        self.add_rows(rows)
+
+    def load(self, queryset):
+        self.add_rows(self.rows(queryset))
+
+    def rows(self, queryset):
+        return queryset.order_by('id').values_list('id', 'token__jti', 'blacklisted_at').iterator(chunk_size=5000)
+
+    def add_rows(self, rows):
+        stable_until = timezone.now() - COMMIT_LAG
+        for id, jti, blacklisted_at in rows:
+            if id not in self.unsettled:
+                self.bloom.add(jti)
+                self.unsettled.add(id)
+                self.loaded += 1
+            if blacklisted_at <= stable_until:
+                self.watermark = max(self.watermark, id)
+        self.unsettled = {id for id in self.unsettled if id > self.watermark}
+
+    def add(self, jti):
+        """
+        Record a token this process has just blacklisted. Its row is counted
+        when the next sync reads it.
+        """
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.watermark = 0
+            self.unsettled = set()
+            self.loaded = 0
+            self.synced_at = None
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def is_blacklisted(jti):
+    blacklist_filter.sync()
+    if jti not in blacklist_filter.bloom:
+        return False
+    # Possibly a false positive
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
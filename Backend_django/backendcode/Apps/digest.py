@@ -0,0 +1,83 @@
+from itertools import groupby
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NotificationDelivery, OutboundEmail, User
+from .sync import SYNC_LAG
+
+# Notification digests. Users who chose an hourly or daily digest get no email per
+# event; manage.py send_notification_digests runs once per window and queues one
+# email per user listing every delivery since their digest_cursor.
+
+# Items listed in one digest; the rest are summarised as a count
+MAX_ITEMS = 50
+BATCH_SIZE = 500
+
+
+def pending_deliveries(frequency, until):
+    """
+    Every recipient's undigested deliveries in one query, grouped by recipient.
+    Deliveries newer than until are left for the next run so that rows from
+    transactions still committing are not skipped past.
+    """
+    return NotificationDelivery.objects.filter(
+        recipient__email_digest=frequency,
+        id__gt=F('recipient__digest_cursor'),
+        created_at__lte=until
+    ).select_related('recipient', 'notification__issue').order_by('recipient_id', 'id')
+
+
+def render_digest(user, deliveries, frequency):
+    count = len(deliveries)
+    lines = [
+        f'- {delivery.created_at:%Y-%m-%d %H:%M} {delivery.notification.issue.title}: {delivery.notification.message}'
+        for delivery in deliveries[-MAX_ITEMS:]
+    ]
+    if count > MAX_ITEMS:
+        lines.insert(0, f'...and {count - MAX_ITEMS} earlier notifications')
+    subject = f'Your {frequency} summary: {count} new notification{"s" if count != 1 else ""}'
+    body = f'''Hello {user.get_full_name() or user.username},
+
+Here is what happened on your academic issues since your last summary:
+
+{chr(10).join(lines)}
+
+You can view the details in the Academic Issue Tracking System.
+'''
+    return subject, body
+
+
+def build_digests(frequency, now=None):
+    """Queue one digest email per user with pending deliveries; returns how many"""
+    until = (now or timezone.now()) - SYNC_LAG
+    queued = 0
+    with transaction.atomic():
+        emails, users = [], []
+        rows = pending_deliveries(frequency, until).iterator(chunk_size=2000)
+        for _, group in groupby(rows, key=attrgetter('recipient_id')):
+            deliveries = list(group)
+            user = deliveries[0].recipient
+            user.digest_cursor = deliveries[-1].id
+            users.append(user)
+            if user.email:
+                subject, body = render_digest(user, deliveries, frequency)
+                emails.append(OutboundEmail(
+                    subject=subject, body=body, from_email=settings.DEFAULT_FROM_EMAIL, to=[user.email]
+                ))
+            if len(users) >= BATCH_SIZE:
+                queued += flush(emails, users)
+        queued += flush(emails, users)
+    return queued
+
+
+def flush(emails, users):
+    OutboundEmail.objects.bulk_create(emails)
+    User.objects.bulk_update(users, ['digest_cursor'])
+    count = len(emails)
+    emails.clear()
+    users.clear()
+    return count
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, Token
+
+from .models import Notification, NotificationDelivery
+
+# Live notifications over Server-Sent Events. notify() publishes an event per
+# delivery once its transaction commits; every open stream in the process waits on
+# its own asyncio queue, so an idle client costs no queries. On PostgreSQL events
+# travel through LISTEN/NOTIFY so streams held by other workers receive them too.
+
+logger = logging.getLogger('Apps')
+
+CHANNEL = 'apps_notifications'
+# pg_notify() rejects payloads of 8000 bytes or more
+MAX_PAYLOAD = 7900
+REPLAY_LIMIT = 100
+RETRY_MS = 5000
+
+
+def heartbeat_interval():
+    return getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+
+
+def relay_enabled():
+    return connection.vendor == 'postgresql' and getattr(settings, 'NOTIFICATION_STREAM_RELAY', True)
+
+
+def serialize(notification, is_read=False):
+    from .serializer import NotificationSerializer
+
+    notification.is_read = is_read
+    return NotificationSerializer(notification).data
+
+
+class Broker:
+    # Hands events to the streams subscribed in this process. Publishers may run
+    # on any thread; each queue is only touched from its own event loop.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, user_id):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(entry)
+        return entry[1]
+
+    def unsubscribe(self, user_id, queue):
+        with self.lock:
+            entries = self.subscribers.get(user_id, set())
+            entries.difference_update({entry for entry in entries if entry[1] is queue})
+            if not entries:
+                self.subscribers.pop(user_id, None)
+
+    def dispatch(self, events):
+        """Deliver (recipient_id, event_id, data) events to matching subscribers"""
+        with self.lock:
+            targets = [
+                (entry, (event_id, data))
+                for recipient_id, event_id, data in events
+                for entry in self.subscribers.get(recipient_id, ())
+            ]
+        for (loop, queue), event in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The stream's loop has already shut down
+                pass
+
+
+broker = Broker()
+
+
+def publish(notification, deliveries):
+    """Send an event to each delivery's recipient once the current transaction commits"""
+    if not deliveries:
+        return
+    data = serialize(notification)
+    targets = [(delivery.recipient_id, delivery.id) for delivery in deliveries]
+    transaction.on_commit(lambda: send(notification.id, targets, data))
+
+
+def send(notification_id, targets, data):
+    if not relay_enabled():
+        broker.dispatch((recipient_id, event_id, data) for recipient_id, event_id in targets)
+        return
+    payload = json.dumps({'notification': notification_id, 'targets': targets, 'data': data}, default=str)
+    if len(payload.encode()) > MAX_PAYLOAD:
+        # Listeners look the notification up themselves
+        payload = json.dumps({'notification': notification_id, 'targets': targets, 'data': None})
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+
+class PostgresRelay:
+    # One LISTEN connection per process, started by the first stream, feeding the broker
+
+    def __init__(self):
+        self.task = None
+
+    def ensure_started(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.listen())
+
+    async def listen(self):
+        import psycopg
+
+        db = settings.DATABASES['default']
+        params = {
+            'dbname': db.get('NAME'), 'user': db.get('USER'), 'password': db.get('PASSWORD'),
+            'host': db.get('HOST'), 'port': db.get('PORT'), **db.get('OPTIONS', {}),
+        }
+        params = {key: value for key, value in params.items() if value}
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(autocommit=True, **params)
+                async with conn:
+                    await conn.execute(f'LISTEN {CHANNEL}')
+                    async for message in conn.notifies():
+                        await self.deliver(json.loads(message.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Notification relay lost its connection, reconnecting')
+                await asyncio.sleep(RETRY_MS / 1000)
+
+    async def deliver(self, payload):
+        data = payload['data']
+        if data is None:
+            notification = await sync_to_async(
+                Notification.objects.select_related(
+                    'issue', 'issue__student', 'issue__assigned_to', 'issue__status'
+                ).get
+            )(id=payload['notification'])
+            data = await sync_to_async(serialize)(notification)
+        broker.dispatch((recipient_id, event_id, data) for recipient_id, event_id in payload['targets'])
+
+
+relay = PostgresRelay()
+
+
+class StreamTicket(Token):
+    """
+    Opens a notification stream and nothing else. EventSource cannot set headers,
+    so the ticket travels in the URL, where proxies and servers may log it: it
+    expires within seconds and its token type is refused wherever an access token
+    is expected. The stream it opens lasts as long as the access token it was
+    issued for.
+    """
+    token_type = 'stream'
+    lifetime = timedelta(seconds=30)
+
+    @classmethod
+    def for_access_token(cls, access):
+        ticket = cls()
+        ticket[api_settings.USER_ID_CLAIM] = access[api_settings.USER_ID_CLAIM]
+        ticket['stream_exp'] = access['exp']
+        return ticket
+
+
+def stream_token(request):
+    """
+    The validated token for a stream request: an access token from the
+    Authorization header, or a StreamTicket from the ?ticket= query parameter.
+    """
+    header = request.headers.get('Authorization', '')
+    try:
+        if header.startswith('Bearer '):
+            return AccessToken(header[len('Bearer '):])
+        if request.GET.get('ticket'):
+            return StreamTicket(request.GET['ticket'])
+    except TokenError:
+        pass
+    return None
+
+
+def missed_events(user_id, last_event_id):
+    deliveries = NotificationDelivery.objects.filter(
+        recipient_id=user_id, id__gt=last_event_id
+    ).order_by('id').prefetch_related(
+        Prefetch('notification', queryset=Notification.objects.select_related(
+            'issue', 'issue__student', 'issue__assigned_to', 'issue__status'
+        ))
+    )[:REPLAY_LIMIT]
+    return [(delivery.id, serialize(delivery.notification, delivery.is_read)) for delivery in deliveries]
+
+
+def format_event(event_id, data):
+    return f'id: {event_id}\nevent: notification\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+async def stream_events(token, last_event_id=None):
+    """
+    Yield SSE frames for the token's user until the client goes away or the token
+    expires. With last_event_id, deliveries the client missed are replayed first.
+    """
+    user_id = token[api_settings.USER_ID_CLAIM]
+    expires = token.get('stream_exp', token['exp'])
+    if relay_enabled():
+        relay.ensure_started()
+    # Subscribe before replaying so nothing published in between is lost
+    queue = broker.subscribe(user_id)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        replayed_up_to = None
+        if last_event_id is not None:
+            for event_id, data in await sync_to_async(missed_events)(user_id, last_event_id):
+                replayed_up_to = event_id
+                yield format_event(event_id, data)
+
+        while True:
+            remaining = expires - time.time()
+            if remaining <= 0:
+                # The client reconnects with a fresh token and its Last-Event-ID
+                return
+            try:
+                event_id, data = await asyncio.wait_for(queue.get(), min(heartbeat_interval(), remaining))
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if replayed_up_to is not None and event_id <= replayed_up_to:
+                continue
+            yield format_event(event_id, data)
+    finally:
+        broker.unsubscribe(user_id, queue)
@@ -11,11 +11,21 @@ class IssueFilter(django_filters.FilterSet):
         field_name="reported_date",
         lookup_expr='lte'
     )
+    # Accepts a user id, or "me" for the requesting user
+    assigned_to = django_filters.CharFilter(method='filter_assigned_to')
 
 
     class Meta:
         model = Issue
         fields = [
             'title', 'description', 'college', 'program', 'year_of_study',
-            'semester', 'course_unit', 'course_code', 'category', 'priority'
+            'semester', 'course_unit', 'course_code', 'category', 'priority',
+            'status', 'assigned_to'
         ]
+
+    def filter_assigned_to(self, queryset, name, value):
+        if value == 'me':
+            return queryset.filter(assigned_to=self.request.user)
+        if not value.isdigit():
+            return queryset.none()
+        return queryset.filter(assigned_to_id=value)
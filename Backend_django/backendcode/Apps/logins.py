@@ -0,0 +1,117 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .models import LoginHistory
+
+# Login history without an INSERT per login. record_login() appends the row to an
+# in-process buffer; a background thread writes the buffer with bulk_create every
+# LOGIN_HISTORY_BATCH_SIZE rows or LOGIN_HISTORY_FLUSH_MS milliseconds, and
+# whatever is left is written when the worker exits.
+
+logger = logging.getLogger('Apps')
+
+
+class LoginHistoryBuffer:
+    def __init__(self, autostart=True):
+        self.autostart = autostart
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.rows = []
+        self.thread = None
+        self.pid = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'LOGIN_HISTORY_BATCH_SIZE', 200)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'LOGIN_HISTORY_MAX_BUFFER', 5000)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'LOGIN_HISTORY_FLUSH_MS', 500) / 1000
+
+    def add(self, row):
+        """Queue an unsaved LoginHistory; saves it right away when buffering is off or full"""
+        if self.interval <= 0:
+            row.save()
+            return
+        with self.lock:
+            self.check_fork()
+            buffered = len(self.rows) < self.max_size
+            if buffered:
+                self.rows.append(row)
+                batch_ready = len(self.rows) >= self.batch_size
+        if not buffered:
+            # The writer is falling behind; this login pays for its own insert
+            # rather than the buffer growing without bound
+            row.save()
+            return
+        if self.autostart:
+            self.start()
+        if batch_ready:
+            self.wake.set()
+
+    def check_fork(self):
+        # A forked worker inherits the parent's rows, which the parent writes itself,
+        # and none of its threads
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.rows = []
+            self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self.run, name='login-history-writer', daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            # This thread's connection is not managed by the request cycle
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Login history writer failed')
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self.lock:
+            rows, self.rows = self.rows, []
+        if not rows:
+            return 0
+        try:
+            LoginHistory.objects.bulk_create(rows, batch_size=self.batch_size)
+            return len(rows)
+        except DatabaseError:
+            # One bad row (say, a user deleted since logging in) fails the whole
+            # batch; write the rest one at a time
+            logger.exception('Bulk write of %d login records failed, retrying one by one', len(rows))
+            written = 0
+            for row in rows:
+                try:
+                    row.save()
+                    written += 1
+                except DatabaseError:
+                    logger.exception('Dropping login record of user %s', row.user_id)
+            return written
+
+
+login_history = LoginHistoryBuffer()
+atexit.register(login_history.flush)
+
+
+def record_login(user, ip_address):
+    now = timezone.now()
+    login_history.add(LoginHistory(user=user, ip_address=ip_address, login_time=now, session_time=now))
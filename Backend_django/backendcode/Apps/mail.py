@@ -0,0 +1,99 @@
+import random
+from datetime import timedelta
+from smtplib import SMTPDataError, SMTPRecipientsRefused, SMTPSenderRefused
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from .models import OutboundEmail, User
+from .notifications import ADMIN_ROLES
+
+# Outgoing mail goes through the OutboundEmail outbox. Request handlers call
+# queue_mail() or queue_fan_out() instead of send_mail(); manage.py run_mail_worker
+# claims due rows and sends them over one SMTP connection, retrying failures
+# with backoff.
+
+# Failures that concern one message; anything else is taken to mean the
+# connection itself is broken and it is reopened for the next message
+MESSAGE_ERRORS = (SMTPDataError, SMTPRecipientsRefused, SMTPSenderRefused)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """
+    Queue an email with send_mail()'s arguments. The row is part of the current
+    transaction, so the mail only goes out if the surrounding work commits.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list)
+    )
+
+
+def wants_immediate(user):
+    return getattr(user, 'email_digest', 'immediate') == 'immediate'
+
+
+def queue_notification_mail(user, subject, message, from_email):
+    """
+    queue_mail() to user about something they were notified of, unless they
+    take notification emails as a digest; send_notification_digests covers
+    those, so nothing is queued.
+    """
+    if not wants_immediate(user):
+        return None
+    return queue_mail(subject, message, from_email, [user.email])
+
+
+def queue_fan_out(subject, render, recipients, from_email, bcc=None, audience=''):
+    """
+    Queue the same announcement to many users with one insert. By default each
+    user gets their own message with the body render(user.get_full_name()). In
+    BCC mode (bcc=True, or EMAIL_FAN_OUT_BCC when bcc is None) a single message
+    with the body render(audience) goes to all of them as blind copies, which
+    costs the mail server one transaction however many users there are.
+    """
+    if bcc is None:
+        bcc = getattr(settings, 'EMAIL_FAN_OUT_BCC', False)
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    recipients = [user for user in recipients if user.email]
+    if not recipients:
+        return []
+    if bcc:
+        emails = [OutboundEmail(
+            subject=subject, body=render(audience), from_email=from_email,
+            bcc=sorted({user.email for user in recipients})
+        )]
+    else:
+        emails = [
+            OutboundEmail(subject=subject, body=render(user.get_full_name()), from_email=from_email, to=[user.email])
+            for user in recipients
+        ]
+    return OutboundEmail.objects.bulk_create(emails)
+
+
+def admin_recipients():
+    return User.objects.filter(role__role_name__in=ADMIN_ROLES).only('email', 'first_name', 'last_name')
+
+
+def queue_admin_mail(subject, render, from_email):
+    """queue_fan_out() to every administrator who has not chosen a digest"""
+    return queue_fan_out(
+        subject, render, admin_recipients().filter(email_digest='immediate'), from_email, audience='Administrator'
+    )
+
+
+def build_message(email, connection=None):
+    return EmailMessage(
+        email.subject, email.body, email.from_email, email.to, bcc=email.bcc, connection=connection
+    )
+
+
+def backoff(attempts):
+    """Delay before retrying a message that has failed attempts times, with jitter"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 30)
+    ceiling = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)
+    delay = min(base * 2 ** (attempts - 1), ceiling)
+    # Spread retries out so a mail server outage does not end in a thundering herd
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
@@ -0,0 +1,205 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Apps.models import User, UserRole, Issue, Lecturer
+from Apps.querybudget import record_queries
+from Apps.serializer import IssueSerializer, IssueListSerializer
+
+# In-process latency benchmark for the hot endpoints. Requests go through the real
+# URLconf and middleware with the DRF test client against whatever database is
+# configured, normally one filled by seed_scale. Writes are rolled back. The render_*
+# entries time the two issue list serializers on one page of rows, without HTTP.
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'cpu_ms')
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {'p50_ms': cuts[49], 'p95_ms': cuts[94], 'p99_ms': cuts[98]}
+
+
+def compare(baseline, current, threshold, metric='p95_ms'):
+    """Regressions of current against baseline, as human readable lines"""
+    regressions = []
+    for name, before in baseline['endpoints'].items():
+        after = current['endpoints'].get(name)
+        if after is None or metric not in before:
+            continue
+        limit = before[metric] * (1 + threshold / 100)
+        if after[metric] > limit:
+            regressions.append(
+                f'{name}: {metric} {before[metric]:.2f}ms -> {after[metric]:.2f}ms '
+                f'(+{(after[metric] / before[metric] - 1) * 100:.0f}%, limit {threshold:g}%)'
+            )
+        if after['queries'] > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {after['queries']}")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the main API endpoints and optionally compares against a saved baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', metavar='BASELINE', help='Fail if slower than this results file')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Allowed slowdown in percent before --compare fails')
+        parser.add_argument('--metric', choices=METRICS, default='p95_ms')
+        parser.add_argument('--only', nargs='*', help='Benchmark only these endpoints')
+        parser.add_argument('--password', default='password123',
+                            help='Password of the seeded users, used by the login benchmark')
+
+    def handle(self, *args, **options):
+        # Test environment: locmem email, 'testserver' allowed as a host
+        try:
+            setup_test_environment()
+            owns_environment = True
+        except RuntimeError:
+            # Already set up, i.e. running inside the test suite
+            owns_environment = False
+        try:
+            # Everything the run writes is rolled back, including the benchmark admin
+            # and tokens. Logins write their history synchronously so it is rolled
+            # back too, instead of reaching the database later from the background writer.
+            with override_settings(LOGIN_HISTORY_FLUSH_MS=0), transaction.atomic():
+                results = self.run(options)
+                transaction.set_rollback(True)
+        finally:
+            if owns_environment:
+                teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            regressions = compare(baseline, results, options['threshold'], options['metric'])
+            if regressions:
+                raise CommandError('Performance regression:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def run(self, options):
+        student = User.objects.filter(
+            student_profile__isnull=False, student_issues__isnull=False
+        ).order_by('id').first()
+        lecturer = Lecturer.objects.select_related('user').order_by('id').first()
+        issue = Issue.objects.order_by('id').first()
+        if not (student and lecturer and issue):
+            raise CommandError('Seed the database first, e.g. manage.py seed_scale')
+        admin = self.bench_admin()
+
+        endpoints = {
+            'login': (None, 'post', reverse('api:api-login'),
+                      {'username': student.username, 'password': options['password']}),
+            'issues': (admin, 'get', reverse('api:issue-list'), None),
+            'student_issues': (student, 'get', reverse('api:student_issues'), None),
+            'notifications': (student, 'get', reverse('api:get_notifications'), None),
+            'admin_statistics': (admin, 'get', reverse('api:admin_statistics'), None),
+            'create_issue': (student, 'post', reverse('api:create_issue'), {
+                'title': 'Benchmark issue', 'description': 'Created by bench_endpoints',
+                'college': 'COCIS', 'program': 'BSCS', 'year_of_study': '1', 'semester': '1',
+                'course_unit': 'Programming', 'course_code': 'CSC1100',
+            }),
+            'assign_issue': (admin, 'post', reverse('api:assign_issue_to_lecturer'),
+                             {'issue_id': issue.id, 'lecturer_id': lecturer.id}),
+        }
+        benchmarks = {}
+        for name, (user, method, url, data) in endpoints.items():
+            client = APIClient()
+            if user is not None:
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+            benchmarks[name] = lambda client=client, method=method, url=url, data=data: (
+                getattr(client, method)(url, data, format='json')
+            )
+        benchmarks.update(self.renderers())
+        if options['only']:
+            unknown = set(options['only']) - set(benchmarks)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            benchmarks = {name: benchmarks[name] for name in options['only']}
+
+        results = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'issues': Issue.objects.count(),
+            },
+            'endpoints': {},
+        }
+        for name, request in benchmarks.items():
+            result = self.measure(request, options)
+            results['endpoints'][name] = result
+            self.stdout.write(
+                f"{name:<24} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"p99 {result['p99_ms']:8.2f}ms  cpu {result['cpu_ms']:8.2f}ms  {result['queries']:3d} queries  "
+                f"{result['peak_kb']:8.0f}KB peak"
+            )
+        return results
+
+    def renderers(self, page_size=50):
+        queryset = Issue.objects.select_related('student', 'assigned_to', 'status').order_by('-reported_date', 'id')
+        rows = IssueListSerializer()
+        return {
+            'render_issue_serializer': lambda: IssueSerializer(queryset[:page_size], many=True).data,
+            'render_issue_rows': lambda: rows.to_representation(rows.get_queryset(queryset)[:page_size]),
+        }
+
+    def bench_admin(self):
+        role, _ = UserRole.objects.get_or_create(role_name='admin', defaults={'name': 'Administrator'})
+        admin, _ = User.objects.get_or_create(
+            username='bench_admin', defaults={'email': 'bench_admin@example.com', 'role': role}
+        )
+        return admin
+
+    def measure(self, request, options):
+        timings, cpu = [], []
+        queries = status_code = 0
+        # Each endpoint starts from the same data, so its writes are rolled back
+        with transaction.atomic():
+            for _ in range(options['warmup']):
+                request()
+            for _ in range(options['iterations']):
+                with record_queries() as report:
+                    started, cpu_started = time.perf_counter(), time.process_time()
+                    response = request()
+                    timings.append((time.perf_counter() - started) * 1000)
+                    cpu.append((time.process_time() - cpu_started) * 1000)
+                queries = max(queries, report.count)
+                # Renderers return the data rather than a response
+                status_code = getattr(response, 'status_code', None)
+
+            tracemalloc.start()
+            try:
+                request()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            transaction.set_rollback(True)
+
+        return {
+            **percentiles(timings),
+            'mean_ms': statistics.fmean(timings),
+            # CPU time of this process, which for login is mostly password hashing
+            'cpu_ms': statistics.fmean(cpu),
+            'queries': queries,
+            'peak_kb': peak / 1024,
+            'status': status_code,
+        }
@@ -0,0 +1,104 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from Apps.models import Notification, NotificationArchive, NotificationDelivery, Tombstone
+
+NOTIFICATION_TABLE = Notification._meta.db_table
+DELIVERY_TABLE = NotificationDelivery._meta.db_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves notifications that every recipient has read and that are older than '
+        '--days into NotificationArchive, in short batches that are safe to run live'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 365),
+                            help='Keep notifications younger than this many days')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to leave room for live traffic')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+        parser.add_argument('--no-vacuum', action='store_true', help='Skip VACUUM/ANALYZE at the end')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        candidates = Notification.objects.filter(created_at__lt=cutoff).filter(
+            ~Exists(NotificationDelivery.objects.filter(notification=OuterRef('pk'), is_read=False))
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} notifications older than {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        archived = 0
+        while True:
+            with transaction.atomic():
+                moved = self.archive_batch(candidates, options['batch_size'])
+            if not moved:
+                break
+            archived += moved
+            self.stdout.write(f'  archived {archived}')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        if archived and not options['no_vacuum']:
+            self.vacuum()
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} notifications older than {cutoff:%Y-%m-%d}'))
+
+    def archive_batch(self, candidates, size):
+        # Lock just this batch; rows another session holds are left for the next run
+        batch = candidates.order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            batch = batch.select_for_update(skip_locked=True, of=('self',))
+        rows = list(batch.values_list('id', 'issue_id', 'message', 'notification_type', 'created_at')[:size])
+        if not rows:
+            return 0
+        ids = [row[0] for row in rows]
+
+        recipients = defaultdict(list)
+        for notification_id, recipient_id in NotificationDelivery.objects.filter(
+            notification_id__in=ids
+        ).values_list('notification_id', 'recipient_id'):
+            recipients[notification_id].append(recipient_id)
+
+        NotificationArchive.objects.bulk_create([
+            NotificationArchive(
+                notification_id=notification_id, issue_id=issue_id, message=message,
+                notification_type=notification_type, created_at=created_at,
+                recipient_ids=sorted(recipients[notification_id])
+            )
+            for notification_id, issue_id, message, notification_type, created_at in rows
+        ], ignore_conflicts=True)
+        # Sync clients drop their copies like any other delete
+        Tombstone.objects.bulk_create([
+            Tombstone(kind='notification', object_id=notification_id, issue_id=issue_id)
+            for notification_id, issue_id, *_ in rows
+        ])
+
+        # Plain DELETEs: every delivery here is read, so the per-row delete signals
+        # (unread counters, one tombstone each) have nothing to add
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{DELIVERY_TABLE}" WHERE notification_id IN ({placeholders})', ids)
+            cursor.execute(f'DELETE FROM "{NOTIFICATION_TABLE}" WHERE id IN ({placeholders})', ids)
+        return len(ids)
+
+    def vacuum(self):
+        # Plain VACUUM takes no exclusive lock, so it is safe with traffic running
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for table in (NOTIFICATION_TABLE, DELIVERY_TABLE):
+                    cursor.execute(f'VACUUM (ANALYZE) "{table}"')
+            else:
+                # SQLite's VACUUM rewrites the whole file under a lock; only refresh statistics
+                cursor.execute(f'ANALYZE "{NOTIFICATION_TABLE}"')
+                cursor.execute(f'ANALYZE "{DELIVERY_TABLE}"')
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes expired outstanding refresh tokens and their blacklist entries in '
+        'short batches, once or every --every seconds'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to leave room for live traffic')
+        parser.add_argument('--every', type=float, default=0.0,
+                            help='Keep running and purge again every this many seconds (0 purges once)')
+
+    def handle(self, *args, **options):
+        while True:
+            purged = self.purge(options['batch_size'], options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired tokens'))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def purge(self, size, pause):
+        # Cut off once, so the run ends even while new tokens keep expiring
+        cutoff = timezone.now()
+        purged = 0
+        while True:
+            with transaction.atomic():
+                ids = list(OutstandingToken.objects.filter(
+                    expires_at__lte=cutoff
+                ).order_by('id').values_list('id', flat=True)[:size])
+                if not ids:
+                    return purged
+                # Their BlacklistedToken rows go with them (on_delete=CASCADE)
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            purged += len(ids)
+            if pause:
+                time.sleep(pause)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Apps.models import NotificationDelivery, UnreadCounter
+
+COUNTER_TABLE = UnreadCounter._meta.db_table
+DELIVERY_TABLE = NotificationDelivery._meta.db_table
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-user unread notification counters from the delivery table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        # Unread deliveries per user, as a correlated subquery over delivery_unread_idx
+        actual = Coalesce(
+            Subquery(
+                NotificationDelivery.objects.filter(recipient=OuterRef('user'), is_read=False)
+                .order_by().values('recipient').annotate(n=Count('id')).values('n'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+        with transaction.atomic():
+            drifted = UnreadCounter.objects.annotate(actual=actual).exclude(count=F('actual'))
+            missing_sql = f'''
+                FROM "{DELIVERY_TABLE}" d
+                WHERE NOT d.is_read
+                  AND NOT EXISTS (SELECT 1 FROM "{COUNTER_TABLE}" c WHERE c.user_id = d.recipient_id)
+            '''
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(DISTINCT d.recipient_id) {missing_sql}')
+                missing = cursor.fetchone()[0]
+
+            if options['dry_run']:
+                self.stdout.write(f'{drifted.count()} counters out of step, {missing} missing')
+                return
+
+            fixed = drifted.update(count=actual, updated_at=timezone.now())
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO "{COUNTER_TABLE}" (user_id, count, updated_at) '
+                    f'SELECT d.recipient_id, COUNT(*), %s {missing_sql} GROUP BY d.recipient_id',
+                    [timezone.now()]
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Corrected {fixed} counters and created {missing}'))
@@ -0,0 +1,117 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from Apps.mail import MESSAGE_ERRORS, backoff, build_message
+from Apps.models import OutboundEmail
+
+logger = logging.getLogger('Apps')
+
+
+class Command(BaseCommand):
+    help = (
+        'Delivers queued OutboundEmail rows in batches over one SMTP connection, '
+        'retrying failures with exponential backoff'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll', type=float, default=5.0,
+                            help='Seconds to wait before looking again when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Send what is due now and exit')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 8),
+                            help='Give up on a message after this many failed sends')
+        parser.add_argument('--lease', type=int, default=300,
+                            help='Seconds a claimed batch stays reserved before another worker may retry it')
+
+    def handle(self, *args, **options):
+        self.mailer = None
+        sent = failed = 0
+        try:
+            while True:
+                batch = self.claim(options['batch_size'], options['lease'])
+                if batch:
+                    done, errors = self.deliver(batch, options['max_attempts'])
+                    sent += done
+                    failed += errors
+                    continue
+                if options['once']:
+                    break
+                # Idle: let the mail server have its connection back until there is work
+                self.close()
+                time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} failed attempts'))
+
+    def claim(self, size, lease):
+        """Reserve a batch of due rows; rows another worker holds are skipped"""
+        now = timezone.now()
+        with transaction.atomic():
+            due = OutboundEmail.objects.filter(
+                status__in=('pending', 'sending'), next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            batch = list(due[:size])
+            if batch:
+                # A worker that dies mid-batch leaves 'sending' rows that come due
+                # again once the lease runs out
+                OutboundEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                    status='sending', next_attempt_at=now + timedelta(seconds=lease)
+                )
+        return batch
+
+    def open(self):
+        if self.mailer is None:
+            self.mailer = get_connection(fail_silently=False)
+            self.mailer.open()
+        return self.mailer
+
+    def close(self):
+        if self.mailer is not None:
+            try:
+                self.mailer.close()
+            except Exception:
+                pass
+            self.mailer = None
+
+    def deliver(self, batch, max_attempts):
+        sent, retries = [], []
+        for email in batch:
+            try:
+                mailer = self.open()
+                mailer.send_messages([build_message(email, mailer)])
+            except Exception as e:
+                if not isinstance(e, MESSAGE_ERRORS):
+                    self.close()
+                email.attempts += 1
+                email.last_error = f'{type(e).__name__}: {e}'[:1000]
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                    logger.error('Giving up on email %s to %s: %s', email.id, email.to, email.last_error)
+                else:
+                    email.status = 'pending'
+                    email.next_attempt_at = timezone.now() + backoff(email.attempts)
+                retries.append(email)
+            else:
+                sent.append(email.id)
+
+        with transaction.atomic():
+            if sent:
+                OutboundEmail.objects.filter(id__in=sent).update(
+                    status='sent', sent_at=timezone.now(), last_error=''
+                )
+            OutboundEmail.objects.bulk_update(
+                retries, ['status', 'attempts', 'next_attempt_at', 'last_error']
+            )
+        return len(sent), len(retries)
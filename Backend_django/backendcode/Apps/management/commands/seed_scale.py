@@ -0,0 +1,242 @@
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from Apps.models import (
+    User, UserRole, Student, Lecturer, Issue, Notification, NotificationDelivery,
+    LoginHistory, Status
+)
+from Apps.notifications import add_unread
+from Apps.versioning import bump
+
+COLLEGES = {
+    'COCIS': ['BSCS', 'BSSE', 'BIST', 'BLIS'],
+    'CEDAT': ['BSCE', 'BSEE', 'BARCH'],
+    'CHUSS': ['BAED', 'BASS', 'BJMC'],
+    'CONAS': ['BSCH', 'BSPH', 'BSMA'],
+}
+COURSE_UNITS = [
+    ('CSC1100', 'Programming'), ('CSC1200', 'Data Structures'), ('CSC2100', 'Databases'),
+    ('CSC2200', 'Operating Systems'), ('MTH1100', 'Calculus'), ('STA1100', 'Statistics'),
+]
+TOPICS = [
+    'Missing marks', 'Wrong marks', 'Missing coursework', 'Retake registration',
+    'Exam clash', 'Transcript error', 'Fees clearance', 'Special exam request',
+]
+MESSAGES = [
+    ('info', 'Issue received and awaiting review'),
+    ('info', 'Issue assigned to a lecturer'),
+    ('info', 'Issue status updated'),
+    ('warning', 'More information needed on this issue'),
+]
+HISTORY_DAYS = 365
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    # Let bulk_create keep the spread-out dates we generate instead of stamping now()
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Generates a large, referentially consistent dataset for load and query plan testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--lecturers', type=int, default=50)
+        parser.add_argument('--issues', type=int, default=10000)
+        parser.add_argument('--notifications-per-issue', type=int, default=2)
+        parser.add_argument('--logins-per-user', type=int, default=2)
+        parser.add_argument('--assigned-ratio', type=float, default=0.6,
+                            help='Share of issues assigned to a lecturer')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed; the same seed and counts give the same data')
+        parser.add_argument('--password', default='password123',
+                            help='Password shared by every generated user, hashed once')
+        parser.add_argument('--prefix', default='seed',
+                            help='Username prefix, so repeated runs do not collide')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 and options['issues'] > 0:
+            raise CommandError('Issues need at least one student')
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users prefixed '{options['prefix']}_' already exist; pass another --prefix")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        # One PBKDF2 run for the whole dataset instead of one per user
+        self.password = make_password(options['password'])
+        started = time.monotonic()
+
+        student_role, _ = UserRole.objects.get_or_create(role_name='student', defaults={'name': 'Student'})
+        lecturer_role, _ = UserRole.objects.get_or_create(role_name='lecturer', defaults={'name': 'Lecturer'})
+        statuses = [
+            Status.objects.filter(status_name=name).first() or Status.objects.create(status_name=name)
+            for name, _ in Status.STATUS_CHOICES
+        ]
+
+        students = self.create_users(options['prefix'], 's', options['students'], student_role, self.student_profile)
+        lecturers = self.create_users(options['prefix'], 'l', options['lecturers'], lecturer_role, self.lecturer_profile)
+        issues = self.create_issues(
+            options['issues'], options['notifications_per_issue'], students, lecturers,
+            statuses, options['assigned_ratio']
+        )
+        logins = self.create_logins(students + lecturers, options['logins_per_user'])
+
+        bump('status', 'user')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(students)} students, {len(lecturers)} lecturers, {issues[0]} issues, '
+            f'{issues[1]} notifications and {logins} login records in {time.monotonic() - started:.1f}s'
+        ))
+
+    def past(self, days=HISTORY_DAYS, after=None):
+        start = after or self.now - timedelta(days=days)
+        return start + (self.now - start) * self.rng.random()
+
+    def bulk_create(self, model, rows):
+        created = []
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic():
+                created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def create_users(self, prefix, kind, count, role, profile):
+        users = self.bulk_create(User, (
+            User(
+                username=f'{prefix}_{kind}{i}', email=f'{prefix}_{kind}{i}@example.com',
+                first_name=f'First{i}', last_name=f'{kind.upper()}{i}',
+                password=self.password, role=role, is_active=True
+            )
+            for i in range(count)
+        ))
+        model = Student if kind == 's' else Lecturer
+        self.bulk_create(model, (profile(user, i) for i, user in enumerate(users)))
+        self.stdout.write(f'  {count} {model.__name__.lower()}s')
+        return [user.pk for user in users]
+
+    def student_profile(self, user, i):
+        college = self.rng.choice(list(COLLEGES))
+        return Student(
+            user=user, college=college, course=self.rng.choice(COLLEGES[college]),
+            student_number=f'9{user.pk:09d}', registration_number=f'SEED/{user.pk}'
+        )
+
+    def lecturer_profile(self, user, i):
+        return Lecturer(
+            user=user, employee_id=f'SEED-EMP{user.pk}', department='Computer Science',
+            college=self.rng.choice(list(COLLEGES)), position='Lecturer'
+        )
+
+    def create_issues(self, count, per_issue, students, lecturers, statuses, assigned_ratio):
+        rng = self.rng
+        open_status = next(status for status in statuses if status.status_name == 'Open')
+        issue_fields = [Issue._meta.get_field('reported_date'), Issue._meta.get_field('updated_at')]
+        notification_fields = [
+            Notification._meta.get_field('created_at'), Notification._meta.get_field('updated_at'),
+            NotificationDelivery._meta.get_field('updated_at'),
+        ]
+        made = notifications = 0
+        unread = Counter()
+
+        with explicit_timestamps(*issue_fields, *notification_fields):
+            for start in range(0, count, self.batch_size):
+                batch = []
+                for _ in range(min(self.batch_size, count - start)):
+                    college = rng.choice(list(COLLEGES))
+                    code, unit = rng.choice(COURSE_UNITS)
+                    assigned = lecturers and rng.random() < assigned_ratio
+                    reported = self.past()
+                    batch.append(Issue(
+                        title=f'{rng.choice(TOPICS)} for {code}',
+                        description=f'{rng.choice(TOPICS)} in {unit}, semester {rng.choice("12")}',
+                        college=college, program=rng.choice(COLLEGES[college]),
+                        year_of_study=rng.choice('1234'), semester=rng.choice('12'),
+                        course_unit=unit, course_code=code,
+                        category=rng.choice(Issue.CATEGORY_CHOICES)[0],
+                        priority=rng.choice(Issue.PRIORITY_CHOICES)[0],
+                        student_id=rng.choice(students),
+                        assigned_to_id=rng.choice(lecturers) if assigned else None,
+                        status=rng.choice(statuses) if assigned else open_status,
+                        reported_date=reported,
+                        updated_at=self.past(after=reported),
+                    ))
+                with transaction.atomic():
+                    Issue.objects.bulk_create(batch)
+                    rows = []
+                    for issue in batch:
+                        created = issue.reported_date
+                        for _ in range(per_issue):
+                            created = self.past(after=created)
+                            kind, message = rng.choice(MESSAGES)
+                            rows.append(Notification(
+                                issue_id=issue.pk, message=f'{message}: {issue.title}',
+                                notification_type=kind, is_read=rng.random() < 0.7,
+                                created_at=created, updated_at=created,
+                            ))
+                    Notification.objects.bulk_create(rows, batch_size=self.batch_size)
+                    # Each notification lands in the student's inbox, and the lecturer's once assigned
+                    deliveries = NotificationDelivery.objects.bulk_create([
+                        NotificationDelivery(
+                            recipient_id=recipient_id, notification_id=notification.pk,
+                            is_read=notification.is_read, created_at=notification.created_at,
+                            updated_at=notification.created_at,
+                        )
+                        for issue, notification in zip(
+                            (issue for issue in batch for _ in range(per_issue)), rows
+                        )
+                        for recipient_id in {issue.student_id, issue.assigned_to_id} - {None}
+                    ], batch_size=self.batch_size)
+                    unread.update(delivery.recipient_id for delivery in deliveries if not delivery.is_read)
+                made += len(batch)
+                notifications += len(rows)
+                self.stdout.write(f'  {made}/{count} issues')
+
+        # Unread counters for the badge, one UPDATE per distinct count
+        by_count = defaultdict(list)
+        for user_id, n in unread.items():
+            by_count[n].append(user_id)
+        with transaction.atomic():
+            for n, user_ids in by_count.items():
+                add_unread(user_ids, by=n)
+        return made, notifications
+
+    def create_logins(self, users, per_user):
+        login_time = LoginHistory._meta.get_field('login_time')
+        with explicit_timestamps(login_time):
+            created = 0
+            rows = (
+                LoginHistory(
+                    user_id=user_id,
+                    ip_address=f'10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}',
+                    login_time=(logged_in := self.past(days=90)),
+                    session_time=logged_in + timedelta(minutes=self.rng.randrange(5, 240)),
+                )
+                for user_id in users
+                for _ in range(per_user)
+            )
+            for batch in batched(rows, self.batch_size):
+                created += len(LoginHistory.objects.bulk_create(batch))
+        return created
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from Apps.digest import build_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Queues one summary email per user who takes notifications as an hourly or '
+        'daily digest; schedule it once per window, e.g. from cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frequency', choices=('hourly', 'daily'), required=True)
+
+    def handle(self, *args, **options):
+        queued = build_digests(options['frequency'])
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} {options['frequency']} digests"))
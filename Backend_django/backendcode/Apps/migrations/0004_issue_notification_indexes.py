@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0003_remove_lecturer_course_units'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-reported_date', 'id'], name='issue_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['student', '-reported_date', 'id'], name='issue_student_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assigned_to', '-reported_date', 'id'], name='issue_assignee_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['status', '-reported_date', 'id'], name='issue_status_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['-created_at'], name='notification_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['issue', '-created_at'], name='notification_issue_created_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:42
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def install_search_backend(apps, schema_editor):
+    from Apps.search import install_search_backend
+    install_search_backend(schema_editor.connection)
+
+
+def remove_search_backend(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('DROP TRIGGER IF EXISTS apps_issue_search_vector_trigger ON "Apps_issue"')
+            cursor.execute('DROP FUNCTION IF EXISTS apps_issue_search_vector_update()')
+            cursor.execute('DROP INDEX IF EXISTS issue_search_vector_idx')
+        elif connection.vendor == 'sqlite':
+            for trigger in ('apps_issue_fts_insert', 'apps_issue_fts_delete', 'apps_issue_fts_update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute('DROP TABLE IF EXISTS "Apps_issue_fts"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0004_issue_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_backend, remove_search_backend),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0005_issue_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('scope', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('issue', 'Issue'), ('notification', 'Notification')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('issue_id', models.BigIntegerField()),
+                ('student_id', models.BigIntegerField(blank=True, null=True)),
+                ('assigned_to_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['updated_at', 'id'], name='issue_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['updated_at', 'id'], name='notification_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Existing notifications were visible to the issue's student and assigned lecturer,
+# and admins saw all of them, so deliver each one to all of those, in set-based
+# INSERT ... SELECT statements
+BACKFILL_SQL = [
+    '''
+    INSERT INTO "Apps_notificationdelivery" (recipient_id, notification_id, is_read, created_at, updated_at)
+    SELECT i.student_id, n.id, n.is_read, n.created_at, n.updated_at
+    FROM "Apps_notification" n JOIN "Apps_issue" i ON i.id = n.issue_id
+    WHERE i.student_id IS NOT NULL
+    ''',
+    '''
+    INSERT INTO "Apps_notificationdelivery" (recipient_id, notification_id, is_read, created_at, updated_at)
+    SELECT i.assigned_to_id, n.id, n.is_read, n.created_at, n.updated_at
+    FROM "Apps_notification" n JOIN "Apps_issue" i ON i.id = n.issue_id
+    WHERE i.assigned_to_id IS NOT NULL
+      AND (i.student_id IS NULL OR i.assigned_to_id <> i.student_id)
+    ''',
+    # Matching admin_ids(), case-insensitively as the old notification list did
+    '''
+    INSERT INTO "Apps_notificationdelivery" (recipient_id, notification_id, is_read, created_at, updated_at)
+    SELECT u.id, n.id, n.is_read, n.created_at, n.updated_at
+    FROM "Apps_notification" n
+    JOIN "Apps_issue" i ON i.id = n.issue_id
+    CROSS JOIN "Apps_user" u
+    JOIN "user_roles" r ON r.id = u.role_id
+    WHERE LOWER(r.role_name) IN ('admin', 'administrator')
+      AND u.id <> COALESCE(i.student_id, 0)
+      AND u.id <> COALESCE(i.assigned_to_id, 0)
+    ''',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0007_updated_at_and_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='Apps.notification')),
+                ('recipient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notification_deliveries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', '-created_at', '-id'], name='delivery_inbox_idx'), models.Index(fields=['recipient', 'is_read', '-created_at', '-id'], name='delivery_unread_idx'), models.Index(fields=['recipient', 'updated_at', 'id'], name='delivery_updated_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recipient', 'notification'), name='delivery_unique_recipient')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_SQL = '''
+    INSERT INTO "Apps_unreadcounter" (user_id, count, updated_at)
+    SELECT recipient_id, COUNT(*), CURRENT_TIMESTAMP
+    FROM "Apps_notificationdelivery"
+    WHERE NOT is_read
+    GROUP BY recipient_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0008_notification_delivery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
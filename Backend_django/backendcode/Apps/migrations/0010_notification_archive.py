@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0009_unread_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_id', models.BigIntegerField(unique=True)),
+                ('issue_id', models.BigIntegerField()),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(max_length=50)),
+                ('recipient_ids', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['issue_id', 'created_at'], name='notification_archive_issue_idx')],
+            },
+        ),
+    ]
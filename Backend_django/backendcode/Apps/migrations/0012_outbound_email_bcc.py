@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0011_outbound_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='bcc',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0012_outbound_email_bcc'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='digest_cursor',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='email_digest',
+            field=models.CharField(choices=[('immediate', 'Immediate'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], default='immediate', max_length=10),
+        ),
+    ]
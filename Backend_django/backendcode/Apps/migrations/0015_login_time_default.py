@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Apps', '0014_user_login_upper_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loginhistory',
+            name='login_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
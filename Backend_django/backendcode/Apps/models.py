@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Upper
+from django.utils import timezone
 import uuid
 import random
 import string
@@ -32,6 +35,23 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     last_login = models.DateTimeField(null=True, blank=True)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # How notification emails reach the user: one per event, or rolled up into an
+    # hourly or daily digest by manage.py send_notification_digests
+    EMAIL_DIGEST_CHOICES = [
+        ('immediate', 'Immediate'),
+        ('hourly', 'Hourly digest'),
+        ('daily', 'Daily digest'),
+    ]
+    email_digest = models.CharField(max_length=10, choices=EMAIL_DIGEST_CHOICES, default='immediate')
+    # Id of the last NotificationDelivery included in one of the user's digests
+    digest_cursor = models.BigIntegerField(default=0)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive login by username or email (Apps/authentication.py)
+            models.Index(Upper('username'), name='user_username_upper_idx'),
+            models.Index(Upper('email'), name='user_email_upper_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username}-{self.role.get_role_name_display() if self.role else 'No role'}"
@@ -93,11 +113,8 @@ class Status(models.Model):
     @classmethod
     def get_default_status(cls):
         """Get or create the default 'Open' status"""
-        status, _ = cls.objects.get_or_create(
-            status_name='Open',
-            defaults={'description': 'Initial status when an issue is created'}
-        )
-        return status
+        from .reference import get_status
+        return get_status('Open', description='Initial status when an issue is created')
 
 class Issue(models.Model):    
     PRIORITY_CHOICES = [
@@ -160,12 +177,25 @@ class Issue(models.Model):
         blank=True,
         on_delete=models.SET_NULL
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/description tsvector, filled by a database trigger (see Apps/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     def __str__(self):
         return f"{self.title} - {self.student}"
 
     class Meta:
         ordering = ['-reported_date']
+        indexes = [
+            # Keyset pagination walks issues in (-reported_date, id) order, optionally
+            # narrowed to one student, assignee or status
+            models.Index(fields=['-reported_date', 'id'], name='issue_reported_idx'),
+            models.Index(fields=['student', '-reported_date', 'id'], name='issue_student_reported_idx'),
+            models.Index(fields=['assigned_to', '-reported_date', 'id'], name='issue_assignee_reported_idx'),
+            models.Index(fields=['status', '-reported_date', 'id'], name='issue_status_reported_idx'),
+            # Delta sync reads rows changed after a watermark
+            models.Index(fields=['updated_at', 'id'], name='issue_updated_idx'),
+        ]
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = (
@@ -178,14 +208,117 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     notification_type = models.CharField(max_length=50, choices=NOTIFICATION_TYPES)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='notification_created_idx'),
+            models.Index(fields=['issue', '-created_at'], name='notification_issue_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='notification_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.issue.title} ({self.notification_type})"
 
+class NotificationDelivery(models.Model):
+    # One row per recipient of a notification, written in bulk when the notification
+    # is created. A user's inbox is a range scan of their own rows, newest first.
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_deliveries',
+        db_index=False  # covered by the composite indexes below
+    )
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    is_read = models.BooleanField(default=False)
+    # Copied from the notification so the inbox can be ordered without a join
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'notification'], name='delivery_unique_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id'], name='delivery_inbox_idx'),
+            models.Index(fields=['recipient', 'is_read', '-created_at', '-id'], name='delivery_unread_idx'),
+            # Delta sync reads a recipient's rows changed after a watermark
+            models.Index(fields=['recipient', 'updated_at', 'id'], name='delivery_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification {self.notification_id} for user {self.recipient_id}"
+
+class NotificationArchive(models.Model):
+    # Append-only copy of the old, fully read notifications that
+    # manage.py compact_notifications removes from the live tables
+    notification_id = models.BigIntegerField(unique=True)
+    issue_id = models.BigIntegerField()
+    message = models.TextField()
+    notification_type = models.CharField(max_length=50)
+    recipient_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['issue_id', 'created_at'], name='notification_archive_issue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived notification {self.notification_id}"
+
+class UnreadCounter(models.Model):
+    # Denormalized count of a user's unread deliveries, kept in step by notify() and
+    # mark_read() so the notification badge reads one row.
+    # manage.py reconcile_unread_counts rebuilds it from NotificationDelivery.
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.count} unread for user {self.user_id}"
+
+class OutboundEmail(models.Model):
+    # Outbox for mail sent by request handlers. queue_mail() writes a row in the
+    # request's own transaction and manage.py run_mail_worker delivers it, so no
+    # request waits on SMTP and a rolled back request sends nothing.
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    subject = models.TextField()
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    bcc = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    # When a pending row is due, or when a claimed row's lease runs out
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Only unsent rows are indexed, so the queue stays small as sent mail piles up
+            models.Index(
+                fields=['next_attempt_at', 'id'], name='outbox_due_idx',
+                condition=models.Q(status__in=['pending', 'sending'])
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.status} email to {', '.join(self.to + self.bcc)}: {self.subject}"
+
 class LoginHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_history')
     ip_address = models.GenericIPAddressField()
-    login_time = models.DateTimeField(auto_now_add=True)
+    # Set when the login happens, not when the buffered row is written (Apps/logins.py)
+    login_time = models.DateTimeField(default=timezone.now, editable=False)
     session_time = models.DateTimeField()
 
 
@@ -210,3 +343,37 @@ class EmailVerification(models.Model):
         # Generate a 6-digit code
         self.code = ''.join(random.choices(string.digits, k=6))
         return self.code
+
+
+class DataVersion(models.Model):
+    # Change counter for slowly changing data ("status", "user", "role"), bumped after
+    # every write commits; list ETags and the reference data registry compare against it
+    scope = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+
+class Tombstone(models.Model):
+    # Left behind when an issue or notification is deleted so delta sync clients
+    # can drop their copy. Ids are plain integers because the rows are gone.
+    KIND_CHOICES = [
+        ('issue', 'Issue'),
+        ('notification', 'Notification'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    issue_id = models.BigIntegerField()
+    student_id = models.BigIntegerField(null=True, blank=True)
+    assigned_to_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
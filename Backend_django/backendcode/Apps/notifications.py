@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .events import publish
+from .models import Notification, NotificationDelivery, UnreadCounter, User
+
+# Creating and reading notifications. Every Notification is delivered to an explicit
+# list of recipients; each recipient gets a NotificationDelivery row that backs their
+# inbox and is counted in their UnreadCounter until marked read.
+
+ADMIN_ROLES = ('admin', 'administrator')
+
+
+def admin_ids():
+    return list(User.objects.filter(role__role_name__in=ADMIN_ROLES).values_list('id', flat=True))
+
+
+def notify(issue, message, notification_type, recipients):
+    """
+    Create a notification about issue and deliver it to recipients (users or
+    user ids; None entries are skipped) with a single bulk insert.
+    """
+    recipient_ids = {getattr(recipient, 'pk', recipient) for recipient in recipients} - {None}
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            issue=issue,
+            message=message,
+            notification_type=notification_type
+        )
+        deliveries = NotificationDelivery.objects.bulk_create([
+            NotificationDelivery(
+                recipient_id=recipient_id,
+                notification=notification,
+                created_at=notification.created_at
+            )
+            for recipient_id in sorted(recipient_ids)
+        ])
+        add_unread(recipient_ids)
+        publish(notification, deliveries)
+    return notification
+
+
+def add_unread(recipient_ids, by=1):
+    """Raise the unread counters of recipient_ids, creating any that are missing"""
+    if not recipient_ids:
+        return
+    updated = UnreadCounter.objects.filter(user_id__in=recipient_ids).update(count=F('count') + by)
+    if updated < len(recipient_ids):
+        # Create the missing rows at zero, then count them like the rest so a
+        # concurrent insert of the same row cannot lose an increment
+        existing = set(UnreadCounter.objects.filter(user_id__in=recipient_ids).values_list('user_id', flat=True))
+        missing = set(recipient_ids) - existing
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user_id) for user_id in missing], ignore_conflicts=True
+        )
+        UnreadCounter.objects.filter(user_id__in=missing).update(count=F('count') + by)
+
+
+def mark_read(user, deliveries):
+    """
+    Mark user's unread rows among deliveries read in a single UPDATE and take them
+    off the unread counter in the same transaction. Returns how many changed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        changed = deliveries.filter(recipient=user, is_read=False).update(is_read=True, updated_at=now)
+        if changed:
+            UnreadCounter.objects.filter(user=user).update(count=F('count') - changed, updated_at=now)
+    return changed
+
+
+def unread_count(user):
+    return UnreadCounter.objects.filter(user=user).values_list('count', flat=True).first() or 0
@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+from .serializer import IssueListSerializer
+
+
+class IssueCursorPagination(CursorPagination):
+    # Keyset pagination for issue listings: the cursor encodes the last seen
+    # reported_date, so deep pages cost the same as the first and no COUNT(*) is run
+    ordering = ('-reported_date', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def paginate_issues(request, queryset, serializer_class):
+    """Paginate an issue queryset for a function based view and build the response"""
+    paginator = IssueCursorPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+def paginate_issue_rows(request, queryset, view=None):
+    """Like paginate_issues, but renders the page through the values_list() fast path"""
+    paginator = IssueCursorPagination()
+    serializer = IssueListSerializer(request)
+    # The cursor is built from the ordering fields, so the rows must carry them
+    # even when ?fields= / ?omit= leave them out of the response
+    ordering = [name.lstrip('-') for name in paginator.get_ordering(request, queryset, view)]
+    rows = serializer.get_queryset(queryset, extra=ordering)
+    page = paginator.paginate_queryset(rows, request, view=view)
+    return paginator.get_paginated_response(serializer.to_representation(page))
@@ -0,0 +1,173 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# Per-request SQL accounting. QueryBudgetMiddleware records every query a request
+# runs, flags SQL shapes that repeat (the usual signature of an N+1) and checks the
+# count against the budget the view declared with @query_budget or a
+# query_budget class attribute. It only does so with DEBUG, QUERY_BUDGET_STRICT or
+# QUERY_BUDGET_ENABLED on; otherwise requests pass straight through.
+
+logger = logging.getLogger('Apps')
+
+NUMBER = re.compile(r'\b\d+(\.\d+)?\b')
+STRING = re.compile(r"'(?:[^']|'')*'")
+IN_LIST = re.compile(r'\bIN \((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+PLACEHOLDER = re.compile(r'%s')
+
+
+def sql_shape(sql):
+    """SQL with its literals collapsed, so queries differing only by parameters compare equal"""
+    shape = STRING.sub('?', sql)
+    shape = NUMBER.sub('?', shape)
+    shape = PLACEHOLDER.sub('?', shape)
+    return IN_LIST.sub('IN (...)', shape)
+
+
+class QueryReport:
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold=None):
+        """SQL shapes run at least threshold times, most frequent first"""
+        if threshold is None:
+            threshold = getattr(settings, 'QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', 5)
+        shapes = Counter(sql_shape(sql) for sql, _ in self.queries)
+        return [(shape, n) for shape, n in shapes.most_common() if n >= threshold]
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+@contextmanager
+def record_queries():
+    """Collect every query run on any connection inside the block, DEBUG or not"""
+    report = QueryReport()
+    wrappers = [conn.execute_wrapper(report) for conn in connections.all()]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield report
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def query_budget(limit):
+    """
+    Declare the most queries a function view may run per request, or a dict of
+    limits by HTTP method. Apply it above @api_view; class based views set a
+    query_budget attribute instead.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def view_budget(view_func):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'cls', None), 'query_budget', None)
+    return budget
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def budget_checks_enabled():
+    # Read per request so tests can override the settings
+    return (
+        settings.DEBUG
+        or getattr(settings, 'QUERY_BUDGET_STRICT', False)
+        or getattr(settings, 'QUERY_BUDGET_ENABLED', False)
+    )
+
+
+class QueryBudgetMiddleware:
+    # Logs requests that go over their view's query budget or repeat a query
+    # shape, and, with DEBUG on, reports X-Query-Count / X-Query-Time headers.
+    # QUERY_BUDGET_STRICT turns a blown budget into an exception, for tests.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        if not budget_checks_enabled():
+            return self.get_response(request)
+        with record_queries() as report:
+            response = self.get_response(request)
+        response.query_report = report
+        self.check(request, response, report)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = view_budget(view_func)
+        if isinstance(budget, dict):
+            budget = budget.get(request.method)
+        request.query_budget = budget
+
+    def check(self, request, response, report):
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(report.count)
+            response['X-Query-Time'] = f'{report.duration * 1000:.1f}ms'
+
+        for shape, n in report.repeated():
+            logger.warning('Possible N+1 on %s: %d x %s', request.path, n, shape)
+
+        budget = request.query_budget
+        if budget is not None and report.count > budget:
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(f"{request.path} ran {report.count} queries, budget is {budget}")
+            logger.warning('%s ran %d queries, budget is %d', request.path, report.count, budget)
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase helpers. assertQueryBudget(response) checks a response against its
+    view's budget; assertFlatQueries(make_rows, request) calls make_rows(1) and
+    make_rows(100) and checks request() stays in budget with the same query
+    count at both sizes. Run them with QUERY_BUDGET_ENABLED on.
+    """
+
+    def assertQueryBudget(self, response):
+        report = getattr(response, 'query_report', None)
+        self.assertIsNotNone(report, 'QueryBudgetMiddleware is off; override QUERY_BUDGET_ENABLED=True')
+        budget = response.wsgi_request.query_budget
+        self.assertIsNotNone(budget, f'{response.wsgi_request.path} declares no query budget')
+        self.assertLessEqual(
+            report.count, budget,
+            f'{response.wsgi_request.path} ran {report.count} queries, budget is {budget}:\n'
+            + '\n'.join(sql for sql, _ in report.queries)
+        )
+        self.assertFalse(report.repeated(), f'{response.wsgi_request.path} repeats a query shape')
+        return report
+
+    def assertFlatQueries(self, make_rows, request, small=1, large=100):
+        make_rows(small)
+        first = self.assertQueryBudget(request())
+        make_rows(large - small)
+        second = self.assertQueryBudget(request())
+        self.assertEqual(
+            first.count, second.count,
+            f'query count grew from {first.count} to {second.count} between {small} and {large} rows'
+        )
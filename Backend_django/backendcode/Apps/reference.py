@@ -0,0 +1,86 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Status, UserRole
+from .versioning import current
+
+# Status and UserRole rows by name, loaded once per process so writes resolve them
+# without a query. Saves in this process drop the registry once they commit (see
+# signals.py); every write to either table also bumps its DataVersion scope, which
+# other workers compare against at most every REFERENCE_DATA_CHECK_MS.
+
+SCOPES = ('status', 'role')
+
+
+class ReferenceRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statuses = None
+        self.roles = None
+        self.stamp = None
+        self.checked_at = None
+
+    @property
+    def check_interval(self):
+        return getattr(settings, 'REFERENCE_DATA_CHECK_MS', 5000) / 1000
+
+    def refresh(self):
+        """
+        The tables as of now, by name. Callers look up in what this returns, since
+        invalidate() may drop the registry's own copy right after.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.statuses is not None and now - self.checked_at < self.check_interval:
+                return {'statuses': self.statuses, 'roles': self.roles}
+            # The counters together with the last write time, so a counter that
+            # restarts (its DataVersion row deleted) still reads as a change
+            versions, last_modified = current(SCOPES)
+            stamp = (tuple(versions), last_modified)
+            if self.statuses is None or stamp != self.stamp:
+                self.load()
+                self.stamp = stamp
+            self.checked_at = now
+            return {'statuses': self.statuses, 'roles': self.roles}
+
+    def load(self):
+        # status_name is not unique; where it repeats, the oldest row wins on purpose
+        statuses = {}
+        for status in Status.objects.order_by('-id'):
+            statuses[status.status_name] = status
+        self.statuses = statuses
+        self.roles = {role.role_name: role for role in UserRole.objects.all()}
+
+    def invalidate(self):
+        with self.lock:
+            self.statuses = None
+            self.roles = None
+            self.stamp = None
+
+    def lookup(self, table, name):
+        found = self.refresh()[table].get(name)
+        # Each caller gets its own instance to change as it likes
+        return copy.copy(found) if found is not None else None
+
+
+reference_data = ReferenceRegistry()
+
+
+def get_status(status_name, **defaults):
+    """The Status named status_name, created with defaults if there is none yet"""
+    status = reference_data.lookup('statuses', status_name)
+    if status is None:
+        # Left out of the registry until the creating transaction commits
+        status, _ = Status.objects.get_or_create(status_name=status_name, defaults=defaults)
+    return status
+
+
+def get_role(role_name, **defaults):
+    """The UserRole named role_name, created with defaults if there is none yet"""
+    role = reference_data.lookup('roles', role_name)
+    if role is None:
+        role, _ = UserRole.objects.get_or_create(role_name=role_name, defaults=defaults)
+    return role
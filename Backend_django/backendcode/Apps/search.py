@@ -0,0 +1,148 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Issue
+
+# Full text search over Issue.title and Issue.description.
+# PostgreSQL keeps a weighted tsvector in Issue.search_vector (maintained by a
+# trigger, GIN indexed); SQLite keeps an external content FTS5 table in step
+# with the issue table through triggers. Both are installed by install_search_backend.
+
+ISSUE_TABLE = Issue._meta.db_table
+FTS_TABLE = f'{ISSUE_TABLE}_fts'
+MAX_TERMS = 10
+
+POSTGRES_SQL = [
+    '''
+    CREATE OR REPLACE FUNCTION apps_issue_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    f'DROP TRIGGER IF EXISTS apps_issue_search_vector_trigger ON "{ISSUE_TABLE}"',
+    f'''
+    CREATE TRIGGER apps_issue_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON "{ISSUE_TABLE}"
+    FOR EACH ROW EXECUTE FUNCTION apps_issue_search_vector_update()
+    ''',
+    f'''
+    UPDATE "{ISSUE_TABLE}" SET search_vector =
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    WHERE search_vector IS NULL
+    ''',
+    f'CREATE INDEX IF NOT EXISTS issue_search_vector_idx ON "{ISSUE_TABLE}" USING gin (search_vector)',
+]
+
+SQLITE_SQL = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5(
+        title, description, content='{ISSUE_TABLE}', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS apps_issue_fts_insert AFTER INSERT ON "{ISSUE_TABLE}" BEGIN
+        INSERT INTO "{FTS_TABLE}"(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS apps_issue_fts_delete AFTER DELETE ON "{ISSUE_TABLE}" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS apps_issue_fts_update AFTER UPDATE OF title, description ON "{ISSUE_TABLE}" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO "{FTS_TABLE}"(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    f'''INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')''',
+]
+
+
+def install_search_backend(conn):
+    """Create the search triggers and index for the connection's database, idempotently"""
+    if conn.vendor == 'postgresql':
+        statements = POSTGRES_SQL
+    elif conn.vendor == 'sqlite':
+        statements = SQLITE_SQL
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def sqlite_triggers_missing(conn):
+    # SQLite drops a table's triggers whenever a migration rebuilds it
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+            "('apps_issue_fts_insert', 'apps_issue_fts_delete', 'apps_issue_fts_update')"
+        )
+        return cursor.fetchone()[0] < 3
+
+
+def search_terms(term):
+    return re.findall(r'\w+', (term or '').lower())[:MAX_TERMS]
+
+
+def search_issues(queryset, term):
+    """
+    Filter an Issue queryset down to the rows matching every word of term (each
+    word also matches as a prefix) and annotate them with search_rank.
+    """
+    terms = search_terms(term)
+    if not terms:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(' & '.join(f'{word}:*' for word in terms), search_type='raw', config='english')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in terms)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s', (match,))
+        ).annotate(
+            # bm25() is lower for better matches; title hits weigh double
+            search_rank=RawSQL(
+                f'SELECT -bm25("{FTS_TABLE}", 2.0, 1.0) FROM "{FTS_TABLE}" '
+                f'WHERE "{FTS_TABLE}" MATCH %s AND rowid = "{ISSUE_TABLE}"."id"',
+                (match,),
+                output_field=FloatField()
+            )
+        )
+
+    # No full text support on this database, fall back to substring matching
+    condition = Q()
+    for word in terms:
+        condition &= Q(title__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition).annotate(search_rank=RawSQL('0', (), output_field=FloatField()))
+
+
+class IssueSearchFilter(filters.SearchFilter):
+    # Drop-in replacement for SearchFilter on issue views, backed by the full text index
+    ordering = ('-search_rank', 'id')
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        return search_issues(queryset, term)
+
+    @classmethod
+    def is_searching(cls, request):
+        return bool(search_terms(request.query_params.get(cls.search_param, '')))
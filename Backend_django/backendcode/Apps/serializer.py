@@ -7,20 +7,23 @@ from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
 from django.db import transaction, IntegrityError
-from django.db.models import Q, F, Avg, Count
+from django.db.models import Q, F, Avg, Count, Case, When, Value, CharField, Max
+from django.db.models.functions import Coalesce, Concat
 from django.utils import timezone
 from datetime import timedelta
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
 import logging
 import traceback
 
 # Import your models
 from .models import (
     User, Student, Lecturer, Administrator, Issue, 
-    Notification, Status, LoginHistory, UserRole, 
+    Notification, NotificationDelivery, Status, LoginHistory, UserRole, 
     PasswordResetToken, EmailVerification
 )
+from .notifications import notify
+from .mail import queue_mail
+from .reference import get_status, get_role
+from .tokens import ClaimsRefreshToken
 
 logger = logging.getLogger(__name__)
 
@@ -74,10 +77,7 @@ class UserRegistrationSerializer(serializers.Serializer):
         validated_data.pop('confirm_password')
 
         # 2) Get or create student role
-        student_role, _ = UserRole.objects.get_or_create(
-            role_name='student',
-            defaults={'name': 'Student'}
-        )
+        student_role = get_role('student', name='Student')
 
         # 3) Create User
         user = User(
@@ -207,11 +207,24 @@ class StatusSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 # Serializer for handling issue data, including related student, Lecturer, and status information.
+# GET requests may narrow the output with ?fields=a,b (or a named projection such as
+# ?fields=summary) and ?omit=a,b; pair it with project_queryset so the omitted
+# columns are never loaded either.
 class IssueSerializer(serializers.ModelSerializer):
     status_name = serializers.SerializerMethodField()
     student_name = serializers.SerializerMethodField()
     assigned_to_name = serializers.SerializerMethodField()
 
+    projections = {
+        'summary': ['id', 'title', 'status', 'status_name', 'priority', 'reported_date'],
+    }
+    # Related rows, and the columns on them, that each method field reads
+    related_sources = {
+        'status_name': ('status', ['status_name']),
+        'student_name': ('student', ['first_name', 'last_name']),
+        'assigned_to_name': ('assigned_to', ['first_name', 'last_name']),
+    }
+
     class Meta:
         model = Issue
         fields = [
@@ -222,6 +235,57 @@ class IssueSerializer(serializers.ModelSerializer):
             'assigned_to_name'
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        selected = self.selected_fields(request)
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    @classmethod
+    def selected_fields(cls, request):
+        """The field names requested with ?fields= / ?omit=, or None for all of them"""
+        if request is None or request.method != 'GET':
+            return None
+        params = getattr(request, 'query_params', request.GET)
+        wanted = [name for name in params.get('fields', '').split(',') if name]
+        omitted = {name for name in params.get('omit', '').split(',') if name}
+        if not wanted and not omitted:
+            return None
+
+        selected = []
+        for name in wanted or cls.Meta.fields:
+            selected.extend(cls.projections.get(name, [name]))
+        selected = [name for name in selected if name in cls.Meta.fields and name not in omitted]
+        # Clients always need the id to address an issue
+        return {'id', *selected}
+
+    @classmethod
+    def project_queryset(cls, queryset, request, always=('reported_date',)):
+        """
+        Load only the columns the selected fields read. always lists extra columns the
+        caller needs, such as the pagination ordering.
+        """
+        selected = cls.selected_fields(request)
+        if selected is None:
+            return queryset.defer('search_vector')
+
+        columns = {'id', *always}
+        joins = {}
+        for name in selected:
+            if name in cls.related_sources:
+                relation, related_columns = cls.related_sources[name]
+                joins.setdefault(relation, set()).update(related_columns)
+            else:
+                columns.add(name)
+
+        only = set(columns) | set(joins)
+        for relation, related_columns in joins.items():
+            only.update(f'{relation}__{column}' for column in related_columns)
+        return queryset.select_related(None).select_related(*joins).only(*only)
+
     def get_status_name(self, obj):
         return obj.status.status_name if obj.status else 'Open'
 
@@ -235,6 +299,59 @@ class IssueSerializer(serializers.ModelSerializer):
             return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}"
         return None
 
+# Read-only fast path for issue lists. Produces exactly the JSON IssueSerializer(many=True)
+# would, but reads flat values_list() rows with the names computed in SQL instead of
+# building model instances and calling the method fields row by row.
+class IssueListSerializer:
+    def __init__(self, request=None):
+        selected = IssueSerializer.selected_fields(request)
+        self.fields = [
+            name for name in IssueSerializer.Meta.fields
+            if selected is None or name in selected
+        ]
+        self.reported_date = serializers.DateTimeField()
+
+    @staticmethod
+    def full_name(relation):
+        return Case(
+            When(**{f'{relation}__isnull': True}, then=Value(None)),
+            default=Concat(f'{relation}__first_name', Value(' '), f'{relation}__last_name'),
+            output_field=CharField(),
+        )
+
+    def name_annotations(self):
+        annotations = {
+            'status_name': Coalesce('status__status_name', Value('Open'), output_field=CharField()),
+            'student_name': self.full_name('student'),
+            'assigned_to_name': self.full_name('assigned_to'),
+        }
+        return {name: expr for name, expr in annotations.items() if name in self.fields}
+
+    def get_queryset(self, queryset, extra=()):
+        """Turn an Issue queryset into the flat rows to_representation expects"""
+        # Columns that pagination orders on ride along after the rendered ones
+        extra = [
+            name for name in dict.fromkeys(('reported_date', *extra, *queryset.query.annotations))
+            if name not in self.fields
+        ]
+        return queryset.annotate(**self.name_annotations()).values_list(
+            *self.fields, *extra, named=True
+        )
+
+    def to_representation(self, rows):
+        names = self.fields
+        width = len(names)
+        format_date = self.reported_date.to_representation
+        has_date = 'reported_date' in names
+        data = []
+        for row in rows:
+            item = dict(zip(names, row[:width]))
+            if has_date:
+                item['reported_date'] = format_date(item['reported_date'])
+            data.append(item)
+        return data
+
+
 # Serializer for Notification model with related issue data.
 class NotificationSerializer(serializers.ModelSerializer):
     issue_title = serializers.SerializerMethodField()
@@ -248,6 +365,8 @@ class NotificationSerializer(serializers.ModelSerializer):
             'id', 'message', 'notification_type', 'is_read', 'created_at',
             'issue', 'issue_title', 'issue_status', 'student_name', 'assigned_to'
         ]
+        # Read state is per recipient and lives on NotificationDelivery
+        read_only_fields = ['is_read']
 
     def get_issue_title(self, obj):
         return obj.issue.title if obj.issue else None
@@ -267,6 +386,40 @@ class NotificationSerializer(serializers.ModelSerializer):
             return f"{obj.issue.assigned_to.first_name} {obj.issue.assigned_to.last_name}".strip()
         return None
 
+# Selects which of the caller's notifications to mark read: a list of ids, every one
+# created up to a timestamp, or all of them. Exactly one must be given.
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    up_to = serializers.DateTimeField(required=False)
+    all = serializers.BooleanField(required=False)
+
+    def validate(self, data):
+        chosen = [key for key in ('ids', 'up_to', 'all') if data.get(key) not in (None, False)]
+        if len(chosen) != 1:
+            raise serializers.ValidationError("Provide exactly one of ids, up_to or all.")
+        return data
+
+    def filter(self, deliveries):
+        if 'ids' in self.validated_data:
+            return deliveries.filter(notification_id__in=self.validated_data['ids'])
+        if 'up_to' in self.validated_data:
+            return deliveries.filter(created_at__lte=self.validated_data['up_to'])
+        return deliveries
+
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['email_digest']
+
+    def update(self, user, validated_data):
+        email_digest = validated_data.get('email_digest', user.email_digest)
+        if email_digest != 'immediate' and user.email_digest == 'immediate':
+            # Everything up to now was already emailed one by one
+            user.digest_cursor = NotificationDelivery.objects.aggregate(last=Max('id'))['last'] or 0
+        user.email_digest = email_digest
+        user.save(update_fields=['email_digest', 'digest_cursor'])
+        return user
+
 class LoginHistorySerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
@@ -410,7 +563,7 @@ class StudentRegistrationView(APIView):
         try:
             with transaction.atomic():
                 # Create or get student role
-                student_role, _ = UserRole.objects.get_or_create(role_name='student')
+                student_role = get_role('student')
                 
                 # Add role to validated data
                 data = request.data.copy()
@@ -440,14 +593,13 @@ class StudentRegistrationView(APIView):
                 
                 # Send verification email
                 try:
-                    send_mail(
+                    queue_mail(
                         'Verify your email - Student Registration',
                         f'Welcome to the Academic Issue Tracking System!\n\nPlease verify your email: {verification_code}',
                         'noreply@yourdomain.com',
                         [student.user.email],
-                        fail_silently=False,
                     )
-                    logger.info('Verification email sent to %s', student.user.email)
+                    logger.info('Verification email queued for %s', student.user.email)
                 except Exception as e:
                     logger.error('Error sending email: %s', str(e))
                     return Response(
@@ -456,7 +608,7 @@ class StudentRegistrationView(APIView):
                     )
                 
                 # Generate tokens
-                refresh = RefreshToken.for_user(student.user)
+                refresh = ClaimsRefreshToken.for_user(student.user)
                 return Response({
                     'success': True,
                     'message': 'Student registered successfully! Check your email for verification.',
@@ -499,7 +651,7 @@ class IssueAssignmentView(APIView):
             issue.save()
             
             # Send email notification
-            send_mail(
+            queue_mail(
                 'Issue Assignment Notification',
                 f"""Hello {issue.student.get_full_name()},
                 Your issue "{issue.title}" has been assigned to {lecturer.user.get_full_name()}. 
@@ -509,7 +661,6 @@ class IssueAssignmentView(APIView):
                 The Academic Issue Tracking System Team""",
                 'noreply@yourdomain.com',
                 [issue.student.user.email],
-                fail_silently=False,
             )
 
             return Response({
@@ -550,17 +701,18 @@ class IssueStatusView(APIView):
                 }, status=status.HTTP_403_FORBIDDEN)
                 
             # Update status
-            new_status_obj, _ = Status.objects.get_or_create(status_name=new_status)
+            new_status_obj = get_status(new_status)
             issue.status = new_status_obj
             issue.save()
             
             # Create notification
             status_context = 'been updated' if new_status != 'Resolved' else 'been resolved'
             
-            notification = Notification.objects.create(
-                issue=issue,
-                message=f'Issue status updated from {old_status} to {new_status}',
-                notification_type='info'
+            notification = notify(
+                issue,
+                f'Issue status updated from {old_status} to {new_status}',
+                'info',
+                [issue.student_id]
             )
             
             # Send email notification
@@ -571,7 +723,7 @@ class IssueStatusView(APIView):
                 'Closed': 'This issue has been closed.'
             }.get(new_status, 'Please check the system for updates.')
             
-            send_mail(
+            queue_mail(
                 'Issue Status Update',
                 f'''Hello {issue.student.get_full_name()},
 Your issue "{issue.title}" has {status_context} to "{new_status}".
@@ -582,7 +734,6 @@ Best regards,
 The Academic Issue Tracking System Team''',
                 'noreply@yourdomain.com',
                 [issue.student.user.email],
-                fail_silently=False,
             )
 
             return Response({
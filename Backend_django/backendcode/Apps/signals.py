@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import (
+    User, UserRole, Student, Lecturer, Administrator, Issue, Notification, NotificationDelivery,
+    Status, Tombstone, UnreadCounter
+)
+from .reference import reference_data
+from .versioning import bump
+
+# Keep the DataVersion name counters, unread counters, delete tombstones, the
+# authenticated user cache and the reference data registry in step with writes
+# made through the ORM
+
+
+@receiver(post_delete, sender=Issue)
+def issue_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind='issue', object_id=instance.pk, issue_id=instance.pk,
+        student_id=instance.student_id, assigned_to_id=instance.assigned_to_id
+    )
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(kind='notification', object_id=instance.pk, issue_id=instance.issue_id)
+
+
+@receiver(pre_delete, sender=Notification)
+def notification_deleting(sender, instance, **kwargs):
+    # Its deliveries are about to go with it; stop counting the unread ones
+    UnreadCounter.objects.filter(
+        user__in=NotificationDelivery.objects.filter(
+            notification=instance, is_read=False
+        ).values('recipient')
+    ).update(count=F('count') - 1)
+
+
+@receiver([post_save, post_delete], sender=Status)
+def status_changed(sender, **kwargs):
+    bump('status')
+    transaction.on_commit(reference_data.invalidate)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, **kwargs):
+    bump('user')
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_auth_changed(sender, instance, **kwargs):
+    user_cache.invalidate(str(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Lecturer)
+@receiver([post_save, post_delete], sender=Administrator)
+def profile_changed(sender, instance, **kwargs):
+    user_cache.invalidate(str(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+def role_changed(sender, **kwargs):
+    # Cached users carry their role; renames are rare enough to start over
+    user_cache.invalidate()
+    bump('role')
+    transaction.on_commit(reference_data.invalidate)
@@ -0,0 +1,134 @@
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import Issue, Notification, NotificationDelivery, Tombstone
+from .serializer import IssueListSerializer, NotificationSerializer
+
+# Delta sync: return the issues, notifications and deletions a user can see that
+# changed after a watermark. The watermark is an opaque token holding a
+# (timestamp, id) keyset position per stream.
+
+SYNC_PAGE_SIZE = 500
+# Rows written by transactions still in flight can carry a timestamp slightly older
+# than their commit. Watermarks never move past now - SYNC_LAG, so rows inside that
+# window are sent again on the next sync; clients upsert by id.
+SYNC_LAG = timedelta(seconds=5)
+
+STREAMS = ('issues', 'notifications', 'deleted')
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def encode_token(marks):
+    payload = {
+        stream: [int(stamp.timestamp() * 1_000_000), pk]
+        for stream, (stamp, pk) in marks.items() if stamp is not None
+    }
+    return urlsafe_base64_encode(json.dumps(payload, separators=(',', ':')).encode())
+
+
+def decode_token(token):
+    if not token:
+        return {}
+    try:
+        payload = json.loads(urlsafe_base64_decode(token))
+        return {
+            stream: (datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc), int(pk))
+            for stream, (micros, pk) in payload.items() if stream in STREAMS
+        }
+    except (ValueError, TypeError, AttributeError):
+        raise InvalidToken('Invalid sync token')
+
+
+def visible_issues(user):
+    """Issues the user may see, following the same role rules as get_notifications"""
+    role = user.role.role_name.lower() if user.role else ''
+    if role == 'student':
+        return Issue.objects.filter(student_id=user.pk)
+    if role == 'lecturer':
+        return Issue.objects.filter(assigned_to_id=user.pk)
+    if role in ['administrator', 'admin']:
+        return Issue.objects.all()
+    return None
+
+
+def visible_tombstones(user, issues):
+    role = user.role.role_name.lower()
+    if role in ['administrator', 'admin']:
+        return Tombstone.objects.all()
+    owner = Q(student_id=user.pk) if role == 'student' else Q(assigned_to_id=user.pk)
+    return Tombstone.objects.filter(
+        (Q(kind='issue') & owner) | Q(kind='notification', issue_id__in=issues.values('id'))
+    )
+
+
+def changed_after(queryset, field, mark):
+    """One page of rows after mark in (field, id) order, and whether more remain"""
+    if mark:
+        stamp, pk = mark
+        queryset = queryset.filter(Q(**{f'{field}__gt': stamp}) | Q(**{field: stamp, 'id__gt': pk}))
+    rows = list(queryset.order_by(field, 'id')[:SYNC_PAGE_SIZE + 1])
+    return rows[:SYNC_PAGE_SIZE], len(rows) > SYNC_PAGE_SIZE
+
+
+def next_mark(rows, field, mark, truncated, cap):
+    if rows:
+        last = rows[-1]
+        mark = (getattr(last, field), last.id)
+    if truncated or mark is None:
+        return mark or (cap, 0)
+    return min(mark, (cap, 0))
+
+
+def sync_changes(request, user, token):
+    marks = decode_token(token)
+    issues = visible_issues(user)
+    cap = timezone.now() - SYNC_LAG
+
+    issue_serializer = IssueListSerializer(request)
+    issue_rows, issues_truncated = changed_after(
+        issue_serializer.get_queryset(issues, extra=('updated_at',)), 'updated_at', marks.get('issues')
+    )
+
+    # Notifications follow the inbox: the user's own deliveries, which also carry
+    # their read state
+    deliveries = NotificationDelivery.objects.filter(recipient=user).prefetch_related(
+        Prefetch('notification', queryset=Notification.objects.select_related(
+            'issue', 'issue__student', 'issue__assigned_to', 'issue__status'
+        ))
+    )
+    notification_rows, notifications_truncated = changed_after(
+        deliveries, 'updated_at', marks.get('notifications')
+    )
+    for delivery in notification_rows:
+        delivery.notification.is_read = delivery.is_read
+
+    tombstone_rows, tombstones_truncated = changed_after(
+        visible_tombstones(user, issues), 'deleted_at', marks.get('deleted')
+    )
+
+    new_marks = {
+        'issues': next_mark(issue_rows, 'updated_at', marks.get('issues'), issues_truncated, cap),
+        'notifications': next_mark(
+            notification_rows, 'updated_at', marks.get('notifications'), notifications_truncated, cap
+        ),
+        'deleted': next_mark(tombstone_rows, 'deleted_at', marks.get('deleted'), tombstones_truncated, cap),
+    }
+    return {
+        'issues': issue_serializer.to_representation(issue_rows),
+        'notifications': NotificationSerializer(
+            [delivery.notification for delivery in notification_rows], many=True
+        ).data,
+        'deleted': {
+            'issues': [row.object_id for row in tombstone_rows if row.kind == 'issue'],
+            'notifications': [row.object_id for row in tombstone_rows if row.kind == 'notification'],
+        },
+        'has_more': issues_truncated or notifications_truncated or tombstones_truncated,
+        'since': encode_token(new_marks),
+    }
@@ -0,0 +1,104 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication, user_cache
+from .models import User
+from .testing import make_student, make_role
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = make_student()
+        self.role = self.user.role
+        self.token = AccessToken.for_user(self.user)
+        user_cache.invalidate()
+        self.addCleanup(user_cache.invalidate)
+
+    def authenticate(self, token=None):
+        return CachedJWTAuthentication().get_user(token or self.token)
+
+    def test_one_query_for_user_role_and_profiles(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+            self.assertEqual(user.role.role_name, 'student')
+            self.assertEqual(user.student_profile.student_number, 'SN-student')
+            self.assertFalse(hasattr(user, 'Lecturer_profile'))
+            self.assertFalse(hasattr(user, 'admin_profile'))
+
+    def test_repeat_requests_skip_the_database(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.role.role_name, 'student')
+        # Each request gets its own copy
+        user.first_name = 'Changed'
+        self.assertEqual(self.authenticate().first_name, '')
+
+    def test_a_new_token_loads_afresh(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate(AccessToken.for_user(self.user))
+
+    def test_saves_invalidate(self):
+        self.authenticate()
+        self.user.first_name = 'Sam'
+        self.user.save()
+        self.assertEqual(self.authenticate().first_name, 'Sam')
+
+        self.user.student_profile.course = 'BSSE'
+        self.user.student_profile.save()
+        self.assertEqual(self.authenticate().student_profile.course, 'BSSE')
+
+        self.role.name = 'Learner'
+        self.role.save()
+        self.assertEqual(self.authenticate().role.name, 'Learner')
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_can_be_switched_off(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        tokens = [AccessToken.for_user(self.user) for _ in range(3)]
+        for token in tokens:
+            self.authenticate(token)
+        self.assertEqual(len(user_cache.entries), 2)
+        with self.assertNumQueries(1):
+            self.authenticate(tokens[0])
+
+    def test_api_request_does_not_query_users_once_cached(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        client.get(reverse('api:unread_count'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('api:unread_count'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'FROM "Apps_user"' in q['sql']])
+
+    def test_writes_check_changes_made_elsewhere(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        url = reverse('api:mark_notifications_read')
+        lecturer = make_role('lecturer')
+        self.assertEqual(client.get(reverse('api:unread_count')).status_code, 200)
+
+        # As another worker would: straight to the database, leaving this cache alone
+        User.objects.filter(pk=self.user.pk).update(role=lecturer)
+        self.assertEqual(self.authenticate().role.role_name, 'student')
+        client.post(url, {'all': True}, format='json')
+        self.assertEqual(self.authenticate().role.role_name, 'lecturer')
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(client.post(url, {'all': True}, format='json').status_code, 401)
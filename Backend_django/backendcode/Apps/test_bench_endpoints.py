@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .logins import login_history
+from .management.commands.bench_endpoints import compare, percentiles
+from .models import User, Issue, LoginHistory, OutboundEmail
+
+
+def results(p95, queries=3):
+    return {'endpoints': {'issues': {'p50_ms': 1.0, 'p95_ms': p95, 'p99_ms': p95, 'queries': queries}}}
+
+
+class BenchEndpointsTests(TestCase):
+    def test_percentiles(self):
+        cuts = percentiles([float(ms) for ms in range(1, 101)])
+        self.assertAlmostEqual(cuts['p50_ms'], 50.5)
+        self.assertAlmostEqual(cuts['p95_ms'], 95.05)
+
+    def test_compare_applies_threshold(self):
+        self.assertEqual(compare(results(10.0), results(10.9), threshold=10), [])
+        self.assertEqual(len(compare(results(10.0), results(11.5), threshold=10)), 1)
+
+    def test_compare_flags_extra_queries(self):
+        self.assertEqual(len(compare(results(10.0), results(10.0, queries=4), threshold=10)), 1)
+
+    def test_runs_against_seeded_data_and_leaves_it_alone(self):
+        call_command('seed_scale', students=3, lecturers=1, issues=10, stdout=StringIO())
+        def counts():
+            return [model.objects.count() for model in (User, Issue, LoginHistory, OutboundEmail)]
+
+        before = counts()
+        out = StringIO()
+        call_command('bench_endpoints', iterations=2, warmup=0, stdout=out)
+        self.assertEqual(counts(), before)
+        self.assertEqual(login_history.rows, [])
+        for name in ('login', 'issues', 'student_issues', 'notifications',
+                     'admin_statistics', 'create_issue', 'assign_issue',
+                     'render_issue_serializer', 'render_issue_rows'):
+            self.assertIn(name, out.getvalue())
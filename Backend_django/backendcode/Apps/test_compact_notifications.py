@@ -0,0 +1,53 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive, NotificationDelivery, Tombstone
+from .notifications import notify, mark_read, unread_count
+from .testing import make_user, make_issue
+
+
+class CompactNotificationsTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student')
+        self.lecturer = make_user('lecturer')
+        self.issue = make_issue(self.student)
+
+    def old_notification(self, message, read_by=()):
+        notification = notify(self.issue, message, 'info', [self.student, self.lecturer])
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=400))
+        for user in read_by:
+            mark_read(user, NotificationDelivery.objects.filter(notification=notification))
+        return notification
+
+    def compact(self, **options):
+        call_command('compact_notifications', days=365, batch_size=2, stdout=StringIO(), **options)
+
+    def test_archives_only_old_fully_read_notifications(self):
+        archived = [self.old_notification(f'Read {i}', read_by=[self.student, self.lecturer]) for i in range(5)]
+        half_read = self.old_notification('Half read', read_by=[self.student])
+        recent = notify(self.issue, 'Recent', 'info', [self.student])
+        mark_read(self.student, NotificationDelivery.objects.filter(notification=recent))
+
+        self.compact()
+
+        self.assertEqual(
+            set(Notification.objects.values_list('id', flat=True)), {half_read.id, recent.id}
+        )
+        self.assertFalse(NotificationDelivery.objects.filter(notification_id__in=[n.id for n in archived]).exists())
+        row = NotificationArchive.objects.get(notification_id=archived[0].id)
+        self.assertEqual((row.message, row.recipient_ids), ('Read 0', sorted([self.student.id, self.lecturer.id])))
+        self.assertEqual(NotificationArchive.objects.count(), 5)
+        self.assertEqual(Tombstone.objects.filter(kind='notification').count(), 5)
+        # Nothing archived was unread, so the counters are untouched
+        self.assertEqual((unread_count(self.student), unread_count(self.lecturer)), (0, 1))
+
+    def test_dry_run_changes_nothing(self):
+        self.old_notification('Read', read_by=[self.student, self.lecturer])
+        out = StringIO()
+        call_command('compact_notifications', days=365, dry_run=True, stdout=out)
+        self.assertIn('1 notifications', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,78 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import DataVersion, NotificationDelivery, Status
+from .notifications import notify, mark_read
+from .testing import make_student, make_admin, make_issue, client_for
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = make_student()
+        self.issue = make_issue(self.user, status=Status.objects.create(status_name='Open'))
+        notify(self.issue, 'Submitted', 'info', [self.user])
+        self.client = client_for(self.user)
+
+    def test_unchanged_notifications_answer_304(self):
+        url = reverse('api:get_notifications')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+
+        # Only the version lookup runs, nothing is queried or serialized
+        with self.assertNumQueries(1):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_new_notification_changes_etag(self):
+        url = reverse('api:get_notifications')
+        etag = self.client.get(url)['ETag']
+        notify(self.issue, 'Assigned', 'info', [self.user])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_other_users_notifications_keep_the_etag(self):
+        url = reverse('api:get_notifications')
+        etag = self.client.get(url)['ETag']
+        other = make_student('other')
+        notify(make_issue(other), 'Submitted', 'info', [other])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_marking_read_changes_the_etag(self):
+        url = reverse('api:get_notifications')
+        etag = self.client.get(url)['ETag']
+        mark_read(self.user, NotificationDelivery.objects.all())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleted_issue_changes_the_etag(self):
+        url = reverse('api:student_issues')
+        etag = self.client.get(url)['ETag']
+        self.issue.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_counters_are_bumped_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Status.objects.create(status_name='Resolved')
+            self.assertFalse(DataVersion.objects.filter(scope='status').exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(DataVersion.objects.get(scope='status').version, 1)
+
+    def test_issue_update_changes_student_issues_etag(self):
+        url = reverse('api:student_issues')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.issue.priority = 'High'
+        self.issue.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_differs_per_query(self):
+        url = reverse('api:issues-list')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'fields': 'summary'})['ETag'])
+
+    def test_statistics_check_the_role_before_answering_304(self):
+        url = reverse('api:admin_statistics')
+        # '*' matches any current ETag, so it would need no knowledge of the data
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 403)
+        self.assertEqual(client_for(make_admin()).get(url, HTTP_IF_NONE_MATCH='*').status_code, 304)
@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.contrib.auth import base_user
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import User, LoginHistory
+from .testing import make_user
+
+
+# Write login history straight away; buffering is covered in test_login_history
+@override_settings(LOGIN_HISTORY_FLUSH_MS=0)
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = make_user('Student', email='Student@Example.com', password='password123')
+
+    def login(self, username, password='password123'):
+        return APIClient().post(reverse('api:api-login'), {'username': username, 'password': password})
+
+    def test_username_or_email_in_any_case(self):
+        for login_input in ('student', 'STUDENT', 'student@example.com'):
+            response = self.login(login_input)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(set(response.data), {'refresh', 'access'})
+        self.assertEqual(LoginHistory.objects.filter(user=self.user).count(), 3)
+
+    def test_password_is_hashed_once_per_login(self):
+        with mock.patch.object(base_user, 'check_password', wraps=base_user.check_password) as check:
+            self.assertEqual(self.login('student').status_code, 200)
+        self.assertEqual(check.call_count, 1)
+
+    def test_rejections(self):
+        self.assertEqual(self.login('student', 'wrong').status_code, 401)
+        self.assertEqual(self.login('nobody').status_code, 401)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login('student').status_code, 401)
+        self.assertFalse(LoginHistory.objects.exists())
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .logins import LoginHistoryBuffer, record_login
+from .models import LoginHistory
+from .testing import make_user
+
+
+@override_settings(LOGIN_HISTORY_BATCH_SIZE=3, LOGIN_HISTORY_MAX_BUFFER=5, LOGIN_HISTORY_FLUSH_MS=500)
+class LoginHistoryBufferTests(TestCase):
+    def setUp(self):
+        self.user = make_user('student', password='password123')
+        # No writer thread; the tests flush by hand
+        self.buffer = LoginHistoryBuffer(autostart=False)
+        patcher = mock.patch('Apps.logins.login_history', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_login_does_not_insert(self):
+        response = APIClient().post(reverse('api:api-login'), {'username': 'student', 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(LoginHistory.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 1)
+        row = LoginHistory.objects.get()
+        self.assertEqual((row.user, row.ip_address), (self.user, '127.0.0.1'))
+
+    def test_flushes_in_one_insert_and_keeps_login_times(self):
+        for i in range(3):
+            record_login(self.user, f'10.0.0.{i}')
+        times = [row.login_time for row in self.buffer.rows]
+        with self.assertNumQueries(1):
+            self.buffer.flush()
+        self.assertEqual(list(LoginHistory.objects.order_by('id').values_list('login_time', flat=True)), times)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_full_batch_wakes_the_writer(self):
+        for i in range(2):
+            record_login(self.user, '10.0.0.1')
+        self.assertFalse(self.buffer.wake.is_set())
+        record_login(self.user, '10.0.0.1')
+        self.assertTrue(self.buffer.wake.is_set())
+
+    def test_full_buffer_falls_back_to_a_direct_insert(self):
+        for i in range(5):
+            record_login(self.user, '10.0.0.1')
+        self.assertFalse(LoginHistory.objects.exists())
+        with self.assertNumQueries(1):
+            record_login(self.user, '10.0.0.2')
+        self.assertEqual(LoginHistory.objects.get().ip_address, '10.0.0.2')
+        self.assertEqual(len(self.buffer.rows), 5)
+
+    def test_failed_bulk_write_falls_back_to_single_rows(self):
+        for i in range(3):
+            record_login(self.user, f'10.0.0.{i}')
+        with mock.patch.object(LoginHistory.objects, 'bulk_create', side_effect=DatabaseError), \
+                self.assertLogs('Apps', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(LoginHistory.objects.count(), 3)
+
+    @override_settings(LOGIN_HISTORY_FLUSH_MS=0)
+    def test_buffering_can_be_switched_off(self):
+        record_login(self.user, '10.0.0.1')
+        self.assertEqual(LoginHistory.objects.count(), 1)
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .mail import queue_mail, queue_admin_mail
+from .models import Issue, Status, Notification, OutboundEmail
+from .reference import reference_data
+from .testing import ISSUE_FORM, make_student, make_lecturer, make_admin, make_issue, client_for
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class MailOutboxTests(TestCase):
+    def setUp(self):
+        # Rows cached by earlier tests were rolled back with them
+        reference_data.invalidate()
+        self.student = make_student()
+        for i in range(2):
+            make_admin(f'registrar{i}', role_name='administrator')
+        Status.objects.create(status_name='Open')
+
+    def admin_mail(self, **settings):
+        with self.settings(**settings):
+            return queue_admin_mail('Announcement', lambda name: f'Hello {name},', None)
+
+    def run_worker(self, **options):
+        call_command('run_mail_worker', once=True, stdout=StringIO(), **options)
+
+    def test_requests_queue_mail_instead_of_sending_it(self):
+        response = client_for(self.student).post(reverse('api:create_issue'), ISSUE_FORM)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 3)
+
+        with mock.patch('Apps.management.commands.run_mail_worker.get_connection',
+                        wraps=mail.get_connection) as get_connection:
+            self.run_worker(batch_size=2)
+        # Two batches over a single connection
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['registrar0@mak.ac.ug', 'registrar1@mak.ac.ug', 'student@example.com']
+        )
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        self.assertFalse(OutboundEmail.objects.filter(sent_at__isnull=True).exists())
+
+    def test_rolled_back_work_sends_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                queue_mail('Subject', 'Body', None, ['student@example.com'])
+                raise RuntimeError
+        self.run_worker()
+        self.assertEqual(mail.outbox, [])
+
+    def test_failed_views_leave_nothing_behind(self):
+        # No student to email, so the view fails after assigning and notifying
+        issue = make_issue()
+        lecturer = make_lecturer()
+        response = client_for(make_admin()).post(
+            reverse('api:assign_issue_to_lecturer'), {'issue_id': issue.id, 'lecturer_id': lecturer.id}
+        )
+        self.assertEqual(response.status_code, 400)
+        issue = Issue.objects.select_related('status').get()
+        self.assertEqual((issue.assigned_to, issue.status), (None, None))
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_failures_are_retried_with_backoff(self):
+        email = queue_mail('Subject', 'Body', None, ['student@example.com'])
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=SMTPServerDisconnected('gone')):
+            self.run_worker()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertIn('SMTPServerDisconnected', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.run_worker()
+        self.assertEqual(mail.outbox, [])
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        self.run_worker()
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        email = queue_mail('Subject', 'Body', None, ['nobody@example.com'])
+        OutboundEmail.objects.filter(pk=email.pk).update(attempts=2)
+        refused = SMTPRecipientsRefused({'nobody@example.com': (550, b'No such user')})
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=refused):
+            self.run_worker(max_attempts=3)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 3))
+
+    def test_expired_claims_are_picked_up_again(self):
+        email = queue_mail('Subject', 'Body', None, ['student@example.com'])
+        # Left behind by a worker that died mid-batch
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            status='sending', next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.run_worker()
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+
+    def test_admin_fan_out_is_one_insert_with_a_message_each(self):
+        # Registered administrators carry the 'admin' role name
+        make_admin('registrar2', first_name='Ann', last_name='Lee')
+        # The admin lookup and the outbox insert
+        with self.assertNumQueries(2):
+            self.admin_mail()
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('Hello Ann Lee,', [message.body for message in mail.outbox])
+
+    def test_bcc_mode_sends_one_message_to_all_admins(self):
+        self.admin_mail(EMAIL_FAN_OUT_BCC=True)
+        self.run_worker()
+        [message] = mail.outbox
+        self.assertEqual(message.to, [])
+        self.assertEqual(message.bcc, ['registrar0@mak.ac.ug', 'registrar1@mak.ac.ug'])
+        self.assertEqual(message.body, 'Hello Administrator,')
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import NotificationDelivery
+from .notifications import notify, unread_count
+from .testing import make_user, make_issue, client_for
+
+
+class MarkReadTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student')
+        self.other = make_user('other')
+        issue = make_issue(self.student)
+        self.notifications = [
+            notify(issue, f'Update {i}', 'info', [self.student, self.other]) for i in range(5)
+        ]
+        self.client = client_for(self.student)
+
+    def mark(self, payload):
+        return self.client.post(reverse('api:mark_notifications_read'), payload, format='json')
+
+    def test_by_ids(self):
+        ids = [n.id for n in self.notifications[:3]]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.mark({'ids': ids})
+        self.assertEqual(response.data, {'updated': 3, 'unread_count': 2})
+        updates = [q for q in ctx.captured_queries if 'UPDATE "Apps_notificationdelivery"' in q['sql']]
+        self.assertEqual(len(updates), 1)
+        # The other recipient's copies are untouched
+        self.assertEqual(unread_count(self.other), 5)
+
+    def test_up_to(self):
+        cutoff = self.notifications[1].created_at
+        later = self.notifications[1].created_at + timedelta(seconds=1)
+        NotificationDelivery.objects.filter(notification__in=self.notifications[2:]).update(created_at=later)
+        response = self.mark({'up_to': cutoff.isoformat()})
+        self.assertEqual(response.data['updated'], 2)
+
+    def test_all_is_idempotent(self):
+        self.assertEqual(self.mark({'all': True}).data['updated'], 5)
+        self.assertEqual(self.mark({'all': True}).data, {'updated': 0, 'unread_count': 0})
+
+    def test_cannot_mark_other_users_notifications(self):
+        self.client.force_authenticate(make_user('third', role_name=None))
+        self.assertEqual(self.mark({'ids': [n.id for n in self.notifications]}).data['updated'], 0)
+        self.assertEqual(unread_count(self.student), 5)
+
+    def test_requires_exactly_one_selector(self):
+        self.assertEqual(self.mark({}).status_code, 400)
+        self.assertEqual(self.mark({'all': True, 'ids': [1]}).status_code, 400)
+        self.assertEqual(self.mark({'ids': ['x']}).status_code, 400)
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .digest import build_digests
+from .models import Status, NotificationDelivery, OutboundEmail
+from .notifications import notify
+from .reference import reference_data
+from .testing import ISSUE_FORM, make_student, make_issue, client_for
+
+
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        # Rows cached by earlier tests were rolled back with them
+        reference_data.invalidate()
+        self.student = self.make_student('student', 'hourly')
+        Status.objects.create(status_name='Open')
+        self.issue = make_issue(self.student)
+
+    def make_student(self, username, email_digest='immediate'):
+        return make_student(
+            username, first_name='Sam', last_name=username.title(), email_digest=email_digest
+        )
+
+    def digest(self):
+        return build_digests('hourly', now=timezone.now() + timedelta(minutes=1))
+
+    def test_one_email_per_user_per_window(self):
+        for i in range(3):
+            notify(self.issue, f'Update {i}', 'info', [self.student])
+        other = self.make_student('other', 'hourly')
+        notify(make_issue(other, 'Exam clash'), 'Received', 'info', [other])
+        self.make_student('daily', 'daily')
+
+        self.assertEqual(self.digest(), 2)
+        email = OutboundEmail.objects.get(to=['student@example.com'])
+        self.assertEqual(email.subject, 'Your hourly summary: 3 new notifications')
+        for i in range(3):
+            self.assertIn(f'Missing marks: Update {i}', email.body)
+
+        # Nothing new: nothing to send
+        self.assertEqual(self.digest(), 0)
+        notify(self.issue, 'Resolved', 'success', [self.student])
+        self.assertEqual(self.digest(), 1)
+        latest = OutboundEmail.objects.filter(to=['student@example.com']).latest('id')
+        self.assertIn('Resolved', latest.body)
+        self.assertNotIn('Update 0', latest.body)
+
+    def test_digest_cost_does_not_grow_with_users(self):
+        def queries():
+            with CaptureQueriesContext(connection) as captured:
+                self.digest()
+            return len(captured)
+
+        notify(self.issue, 'Update', 'info', [self.student])
+        one_user = queries()
+        for i in range(5):
+            user = self.make_student(f'student{i}', 'hourly')
+            notify(make_issue(user), 'Update', 'info', [user])
+        self.assertEqual(queries(), one_user)
+
+    def test_recent_deliveries_wait_for_the_next_run(self):
+        notify(self.issue, 'Just now', 'info', [self.student])
+        self.assertEqual(build_digests('hourly'), 0)
+
+    def test_digest_users_get_no_email_per_event(self):
+        immediate = self.make_student('immediate')
+        for user, expected in ((self.student, 0), (immediate, 1)):
+            response = client_for(user).post(
+                reverse('api:create_issue'), {**ISSUE_FORM, 'title': 'Exam clash'}
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(OutboundEmail.objects.filter(to=[user.email]).count(), expected)
+
+    def test_switching_to_a_digest_starts_from_now(self):
+        immediate = self.make_student('immediate')
+        issue = make_issue(immediate)
+        notify(issue, 'Already emailed', 'info', [immediate])
+        client = client_for(immediate)
+        url = reverse('api:notification_preferences')
+
+        self.assertEqual(client.get(url).data, {'email_digest': 'immediate'})
+        self.assertEqual(client.patch(url, {'email_digest': 'weekly'}).status_code, 400)
+        response = client.patch(url, {'email_digest': 'hourly'})
+        self.assertEqual(response.data, {'email_digest': 'hourly'})
+        immediate.refresh_from_db()
+        self.assertEqual(immediate.digest_cursor, NotificationDelivery.objects.latest('id').id)
+
+        notify(issue, 'After switching', 'info', [immediate])
+        self.digest()
+        email = OutboundEmail.objects.get(to=[immediate.email])
+        self.assertIn('After switching', email.body)
+        self.assertNotIn('Already emailed', email.body)
@@ -0,0 +1,59 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Issue, Status, NotificationDelivery
+from .notifications import notify
+from .reference import reference_data
+from .testing import ISSUE_FORM, make_student, make_lecturer, make_admin, client_for
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationInboxTests(TestCase):
+    def setUp(self):
+        # Rows cached by earlier tests were rolled back with them
+        reference_data.invalidate()
+        self.student = make_student()
+        self.lecturer = make_lecturer(first_name='Jane', last_name='Doe')
+        self.admin = make_admin()
+        Status.objects.create(status_name='Open')
+
+    def inbox(self, user, **params):
+        response = client_for(user).get(reverse('api:get_notifications'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['message'] for row in response.data]
+
+    def create_issue(self):
+        response = client_for(self.student).post(reverse('api:create_issue'), ISSUE_FORM)
+        self.assertEqual(response.status_code, 201, response.data)
+        return Issue.objects.get()
+
+    def test_each_party_gets_only_their_own_messages(self):
+        issue = self.create_issue()
+        response = client_for(self.admin).post(
+            reverse('api:assign_issue_to_lecturer'), {'issue_id': issue.id, 'lecturer_id': self.lecturer.id}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.inbox(self.admin), ['New academic issue submitted: Missing marks'])
+        self.assertEqual(self.inbox(self.lecturer.user), ['You have been assigned a new issue: Missing marks'])
+        self.assertEqual(self.inbox(self.student), [
+            'Your issue "Missing marks" has been assigned to Jane Doe',
+            'Your issue "Missing marks" has been submitted successfully',
+        ])
+
+    def test_read_state_is_per_recipient(self):
+        issue = self.create_issue()
+        notification = notify(issue, 'Reminder', 'info', [self.student, self.admin])
+        NotificationDelivery.objects.filter(notification=notification, recipient=self.student).update(is_read=True)
+
+        self.assertNotIn('Reminder', self.inbox(self.student, unread=1))
+        self.assertIn('Reminder', self.inbox(self.admin, unread=1))
+
+    def test_inbox_cost_does_not_depend_on_volume(self):
+        issue = self.create_issue()
+        for i in range(30):
+            notify(issue, f'Update {i}', 'info', [self.student])
+        client = client_for(self.student)
+        # Version lookup, the delivery index scan and the notification fetch by id
+        with self.assertNumQueries(3):
+            client.get(reverse('api:get_notifications'))
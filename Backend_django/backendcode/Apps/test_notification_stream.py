@@ -0,0 +1,108 @@
+import asyncio
+import json
+from contextlib import suppress
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .events import StreamTicket, broker
+from .notifications import notify
+from .testing import make_user, make_issue
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student')
+        self.issue = make_issue(self.student)
+        self.token = str(AccessToken.for_user(self.student))
+
+    def notify(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            return notify(self.issue, message, 'info', [self.student])
+
+    async def open_stream(self, params=None, **headers):
+        if params is None:
+            headers = {'Authorization': f'Bearer {self.token}', **headers}
+        response = await self.async_client.get(reverse('api:notification_stream'), params, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertTrue((await anext(stream)).decode().startswith('retry:'))
+        return stream
+
+    async def next_event(self, stream):
+        frame = (await asyncio.wait_for(anext(stream), 5)).decode()
+        fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+        return int(fields['id']), json.loads(fields['data'])
+
+    async def test_requires_a_token(self):
+        response = await self.async_client.get(reverse('api:notification_stream'))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(reverse('api:notification_stream'), {'ticket': 'nope'})
+        self.assertEqual(response.status_code, 401)
+        # Access tokens are not accepted in the URL, where they could be logged
+        for params in ({'token': self.token}, {'ticket': self.token}):
+            response = await self.async_client.get(reverse('api:notification_stream'), params)
+            self.assertEqual(response.status_code, 401)
+
+    async def test_opens_with_a_stream_ticket(self):
+        response = await sync_to_async(self.client.post)(
+            reverse('api:notification_stream_ticket'), headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        ticket = response.data['ticket']
+        # Good for the stream only, which lasts as long as the access token
+        self.assertEqual(StreamTicket(ticket)['stream_exp'], AccessToken(self.token)['exp'])
+        response = await sync_to_async(self.client.get)(
+            reverse('api:get_notifications'), headers={'Authorization': f'Bearer {ticket}'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+        stream = await self.open_stream({'ticket': ticket})
+        await asyncio.sleep(0)
+        await sync_to_async(self.notify)('Issue assigned')
+        event_id, data = await self.next_event(stream)
+        self.assertEqual(data['message'], 'Issue assigned')
+        await stream.aclose()
+
+    async def test_pushes_new_notifications(self):
+        stream = await self.open_stream()
+        # The generator subscribes on its first step, so give it a turn before publishing
+        await asyncio.sleep(0)
+        self.assertIn(self.student.id, broker.subscribers)
+        await sync_to_async(self.notify)('Issue assigned')
+        event_id, data = await self.next_event(stream)
+        self.assertEqual(data['message'], 'Issue assigned')
+
+        # A client disconnect cancels the pending read, which unsubscribes the stream
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with suppress(asyncio.CancelledError):
+            await pending
+        self.assertNotIn(self.student.id, broker.subscribers)
+
+    async def test_resumes_after_last_event_id(self):
+        first = await sync_to_async(self.notify)('Submitted')
+        await sync_to_async(self.notify)('Assigned')
+        last_seen = await sync_to_async(lambda: first.deliveries.get().id)()
+        stream = await self.open_stream(**{'Last-Event-ID': str(last_seen)})
+        event_id, data = await self.next_event(stream)
+        self.assertGreater(event_id, last_seen)
+        self.assertEqual(data['message'], 'Assigned')
+        await stream.aclose()
+
+    async def test_idle_stream_runs_no_queries(self):
+        with self.settings(NOTIFICATION_STREAM_HEARTBEAT=0.01):
+            stream = await self.open_stream()
+            queries = CaptureQueriesContext(connection)
+            await sync_to_async(queries.__enter__)()
+            self.assertEqual(await anext(stream), b': ping\n\n')
+            self.assertEqual(await anext(stream), b': ping\n\n')
+            await sync_to_async(queries.__exit__)(None, None, None)
+            self.assertEqual(len(queries), 0)
+            await stream.aclose()
@@ -0,0 +1,42 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Issue, Status
+from .testing import ISSUE_FIELDS, make_student, client_for
+
+
+class IssueCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_student()
+        status_open = Status.objects.create(status_name='Open')
+        Issue.objects.bulk_create([
+            Issue(title=f'Issue {i}', student=self.user, status=status_open, **ISSUE_FIELDS)
+            for i in range(7)
+        ])
+        self.client = client_for(self.user)
+
+    def walk(self, url):
+        """Follow next cursors until the last page, returning every id seen"""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_issue_list_pages_cover_every_issue_once(self):
+        ids = self.walk(reverse('api:issue-list') + '?page_size=3')
+        self.assertEqual(sorted(ids), sorted(Issue.objects.values_list('id', flat=True)))
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_student_issues_are_paginated(self):
+        response = self.client.get(reverse('api:student_issues') + '?page_size=5')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_issue_viewset_list_is_paginated(self):
+        ids = self.walk(reverse('api:issues-list') + '?page_size=4')
+        self.assertEqual(len(ids), 7)
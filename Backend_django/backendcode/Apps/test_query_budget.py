@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import user_cache
+from .models import User, LoginHistory, UserRole
+from .notifications import notify
+from .views import IssueViewSet
+from .querybudget import QueryBudgetTestMixin, QueryBudgetExceeded, record_queries, sql_shape
+from .testing import make_user, make_student, make_lecturer, make_admin, make_issue, client_for
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Every budgeted endpoint runs the same number of queries for 1 row as for 100"""
+
+    def setUp(self):
+        self.admin = make_admin()
+        self.student = make_student()
+        self.created = 0
+
+    def get(self, user, url):
+        # Authenticate with a real token so the user and role lookups are counted too
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        def request():
+            # Authenticate cold every time so both runs count the same work
+            user_cache.invalidate()
+            return client.get(url)
+        return request
+
+    def make_issues(self, n):
+        for _ in range(n):
+            self.created += 1
+            issue = make_issue(self.student, f'Missing marks {self.created}')
+            notify(issue, 'Issue received', 'info', [self.student])
+
+    def make_students(self, n):
+        for _ in range(n):
+            self.created += 1
+            make_student(f'student{self.created}')
+
+    def make_lecturers(self, n):
+        for _ in range(n):
+            self.created += 1
+            make_lecturer(f'lecturer{self.created}')
+
+    def make_logins(self, n):
+        for _ in range(n):
+            LoginHistory.objects.create(user=self.student, ip_address='127.0.0.1', session_time='2025-01-01T00:00Z')
+
+    def test_issue_list(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.admin, reverse('api:issues-list')))
+
+    def test_filter_issues(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.admin, reverse('api:filter_issues')))
+
+    def test_student_issues(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.student, reverse('api:student_issues')))
+
+    def test_notifications(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.student, reverse('api:get_notifications')))
+
+    def test_notification_viewset(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.admin, reverse('api:notifications-list')))
+
+    def test_sync(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.student, reverse('api:sync')))
+
+    def test_admin_statistics(self):
+        self.assertFlatQueries(self.make_issues, self.get(self.admin, reverse('api:admin_statistics')))
+
+    def test_students(self):
+        self.assertFlatQueries(self.make_students, self.get(self.admin, reverse('api:students-list')))
+
+    def test_lecturers(self):
+        self.assertFlatQueries(self.make_lecturers, self.get(self.admin, reverse('api:lecturers-list')))
+
+    def test_login_history(self):
+        self.assertFlatQueries(self.make_logins, self.get(self.admin, reverse('api:login-history-list')))
+
+
+class QueryRecorderTests(TestCase):
+    def test_shapes_ignore_parameters(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM "a" WHERE "id" = 12 AND "name" = \'x\''),
+            sql_shape('SELECT * FROM "a" WHERE "id" = 7 AND "name" = \'yy\''),
+        )
+        self.assertEqual(sql_shape('WHERE id IN (%s, %s, %s)'), sql_shape('WHERE id IN (%s)'))
+
+    def test_repeated_shapes_are_flagged(self):
+        for i in range(6):
+            make_user(f'u{i}')
+        with record_queries() as report:
+            for user in User.objects.select_related('role'):
+                user.role
+        self.assertEqual((report.count, report.repeated()), (1, []))
+
+        with record_queries() as report:
+            for user in User.objects.all():
+                UserRole.objects.get(pk=user.role_id)
+        self.assertEqual(len(report.repeated()), 1)
+
+    def test_off_unless_enabled(self):
+        client = client_for(make_admin())
+        response = client.get(reverse('api:issues-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response, 'query_report'))
+        for setting in ('DEBUG', 'QUERY_BUDGET_ENABLED', 'QUERY_BUDGET_STRICT'):
+            with override_settings(**{setting: True}):
+                self.assertTrue(hasattr(client.get(reverse('api:issues-list')), 'query_report'))
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict_mode_raises(self):
+        client = client_for(make_admin())
+        with mock.patch.object(IssueViewSet, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                client.get(reverse('api:issues-list'))
@@ -0,0 +1,183 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .authentication import find_login_user
+from .models import User, Student, Issue, Notification, NotificationDelivery, Status
+from .testing import ISSUE_FIELDS, make_role, make_user, make_lecturer, make_admin
+
+STUDENTS = 40
+ISSUES_PER_STUDENT = 50
+
+
+def explain(sql):
+    """Return the plan for a captured SELECT as a list of lines"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN ' + sql)
+        else:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+def plan_problems(plan, allow_sort=False):
+    """Lines of a plan that show a full table scan or an explicit sort step"""
+    problems = []
+    for line in plan:
+        if connection.vendor == 'postgresql':
+            if 'Seq Scan' in line or (not allow_sort and re.search(r'\bSort\b', line)):
+                problems.append(line)
+        elif re.search(r'\bSCAN \w+$', line) or (not allow_sort and 'USE TEMP B-TREE' in line):
+            problems.append(line)
+    return problems
+
+
+class IssueQueryPlanTests(TestCase):
+    """
+    EXPLAIN the SQL issued by the hot issue and notification endpoints against a
+    seeded table and fail when a query stops being served by an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        student_role = make_role('student')
+        cls.admin = make_admin()
+        cls.lecturer = make_lecturer().user
+        students = User.objects.bulk_create([
+            User(username=f'student{i}', email=f'student{i}@example.com', role=student_role)
+            for i in range(STUDENTS)
+        ])
+        Student.objects.bulk_create([
+            Student(
+                user=user, college='COCIS', student_number=f'21000{i:05d}',
+                registration_number=f'21/U/{i:05d}', course='BSCS'
+            )
+            for i, user in enumerate(students)
+        ])
+        statuses = [
+            Status.objects.create(status_name=name)
+            for name, _ in Status.STATUS_CHOICES
+        ]
+        issues = Issue.objects.bulk_create([
+            Issue(
+                title=f'Missing marks {i}', student=user,
+                assigned_to=cls.lecturer if i % 5 == 0 else None,
+                status=statuses[i % len(statuses)], **ISSUE_FIELDS
+            )
+            for user in students
+            for i in range(ISSUES_PER_STUDENT)
+        ])
+        notifications = Notification.objects.bulk_create([
+            Notification(issue=issue, message='Issue update', notification_type='info')
+            for issue in issues
+            for _ in range(2)
+        ])
+        NotificationDelivery.objects.bulk_create([
+            NotificationDelivery(recipient_id=recipient_id, notification=notification, created_at=notification.created_at)
+            for notification in notifications
+            for recipient_id in {notification.issue.student_id, notification.issue.assigned_to_id} - {None}
+        ])
+        # Admins are notified about every new issue
+        NotificationDelivery.objects.bulk_create([
+            NotificationDelivery(recipient=cls.admin, notification=notification, created_at=notification.created_at)
+            for notification in notifications[::2]
+        ])
+        cls.student = students[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Make the planner prove an index path exists rather than letting it
+            # pick a scan because the test table is smaller than production
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+
+    def assertIndexedPlans(self, user, url, allow_sort=False):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+
+        # Only the large tables matter; Status and UserRole are read whole by design
+        selects = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].lstrip().upper().startswith('SELECT')
+            and re.search(r'FROM "Apps_(issue|notification|notificationdelivery)"', q['sql'])
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            problems = plan_problems(explain(sql), allow_sort=allow_sort)
+            self.assertFalse(problems, f'{url} ran an unindexed query:\n{sql}\n' + '\n'.join(problems))
+
+    def test_student_issues(self):
+        self.assertIndexedPlans(self.student, reverse('api:student_issues'))
+
+    def test_notifications_for_student(self):
+        self.assertIndexedPlans(self.student, reverse('api:get_notifications'))
+
+    def test_unread_notifications_for_student(self):
+        self.assertIndexedPlans(self.student, reverse('api:get_notifications') + '?unread=1')
+
+    def test_notifications_for_lecturer(self):
+        self.assertIndexedPlans(self.lecturer, reverse('api:get_notifications'))
+
+    def test_notifications_for_admin(self):
+        self.assertIndexedPlans(self.admin, reverse('api:get_notifications'))
+
+    def test_issue_viewset_filtered_by_status(self):
+        status_id = Status.objects.get(status_name='Assigned').id
+        self.assertIndexedPlans(self.admin, reverse('api:issues-list') + f'?status={status_id}')
+
+    def test_issue_viewset_filtered_by_assignee(self):
+        self.assertIndexedPlans(self.lecturer, reverse('api:issues-list') + '?assigned_to=me')
+
+    def test_issue_viewset_unfiltered(self):
+        self.assertIndexedPlans(self.admin, reverse('api:issues-list'))
+
+    def test_admin_statistics(self):
+        self.assertIndexedPlans(self.admin, reverse('api:admin_statistics'))
+
+
+class LoginQueryPlanTests(TestCase):
+    """The case-insensitive login lookup must probe the UPPER() indexes, not scan users"""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = make_role('student')
+        User.objects.bulk_create([
+            User(username=f'Student{i}', email=f'Student{i}@Example.com', role=role)
+            for i in range(200)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_lookup_probes_both_indexes(self):
+        for login_input, username in (('student7', 'Student7'), ('STUDENT8@example.COM', 'Student8')):
+            with CaptureQueriesContext(connection) as ctx:
+                user = find_login_user(login_input)
+            self.assertEqual(user.username, username)
+            [sql] = [q['sql'] for q in ctx.captured_queries]
+            plan = explain(sql)
+            self.assertFalse(plan_problems(plan), f'Login lookup scanned a table:\n{sql}\n' + '\n'.join(plan))
+            for index in ('user_username_upper_idx', 'user_email_upper_idx'):
+                self.assertTrue(any(index in line for line in plan), '\n'.join(plan))
+
+    def test_case_variants_resolve_to_the_exact_match(self):
+        make_user('student7', role_name=None, email='other@example.com')
+        self.assertEqual(find_login_user('student7').email, 'other@example.com')
+        self.assertEqual(find_login_user('Student7').email, 'Student7@Example.com')
+        self.assertIsNone(find_login_user('STUDENT7'))
+        self.assertIsNone(find_login_user('nobody'))
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Status, UserRole
+from .reference import get_role, get_status, reference_data
+from .testing import ISSUE_FORM, make_student, client_for
+from .versioning import bump
+
+
+class ReferenceRegistryTests(TestCase):
+    def setUp(self):
+        reference_data.invalidate()
+        self.addCleanup(reference_data.invalidate)
+        self.open = Status.objects.create(status_name='Open')
+        self.role = UserRole.objects.create(name='Student', role_name='student')
+
+    def test_lookups_are_served_from_memory(self):
+        get_status('Open')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_status('Open'), self.open)
+            self.assertEqual(get_role('student'), self.role)
+            self.assertEqual(Status.get_default_status(), self.open)
+        # Each caller gets its own instance
+        get_status('Open').status_name = 'Changed'
+        self.assertEqual(get_status('Open').status_name, 'Open')
+
+    def test_lookup_survives_an_invalidate_racing_it(self):
+        refresh = reference_data.refresh
+
+        def refresh_then_invalidate():
+            # As a commit on another thread would, between refresh() and the lookup
+            tables = refresh()
+            reference_data.invalidate()
+            return tables
+
+        with mock.patch.object(reference_data, 'refresh', refresh_then_invalidate):
+            self.assertEqual(get_status('Open'), self.open)
+            self.assertEqual(get_role('student'), self.role)
+
+    def test_missing_rows_are_created_and_picked_up_after_commit(self):
+        get_status('Open')
+        with self.captureOnCommitCallbacks(execute=True):
+            resolved = get_status('Resolved', description='Done')
+        self.assertEqual(Status.objects.get(status_name='Resolved').description, 'Done')
+        with self.assertNumQueries(3):
+            # The version stamp, then both tables again
+            self.assertEqual(get_status('Resolved'), resolved)
+
+    def test_edits_in_other_workers_show_up_through_the_version_stamp(self):
+        get_role('student')
+        # As another worker would: no signals reach this process
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.filter(id=self.role.id).update(name='Learner')
+            bump('role')
+        self.assertEqual(get_role('student').name, 'Student')
+        with override_settings(REFERENCE_DATA_CHECK_MS=0):
+            self.assertEqual(get_role('student').name, 'Learner')
+
+    def test_creating_an_issue_reads_no_reference_data(self):
+        client = client_for(make_student())
+        get_status('Open')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post(reverse('api:create_issue'), ISSUE_FORM)
+        self.assertEqual(response.status_code, 201, response.data)
+        tables = ('FROM "Apps_status"', 'FROM "user_roles"')
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if any(t in q['sql'] for t in tables)])
@@ -0,0 +1,59 @@
+from django.contrib import admin
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from .models import Issue
+from .search import search_issues
+from .testing import make_user, make_admin, make_issue, client_for
+
+
+class IssueSearchTests(TestCase):
+    def setUp(self):
+        self.marks = make_issue(
+            title='Missing coursework marks', description='My CSC1100 marks are not on the portal'
+        )
+        self.appeal = make_issue(
+            title='Appeal for retake', description='Requesting a review of my missing exam marks'
+        )
+        self.fees = make_issue(title='Fees clearance', description='Tuition payment not reflected')
+        self.client = client_for(make_admin())
+
+    def search(self, term):
+        response = self.client.get(reverse('api:issues-list'), {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_matches_every_word(self):
+        self.assertEqual(set(self.search('missing marks')), {self.marks.id, self.appeal.id})
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('missing')[0], self.marks.id)
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.search('tuit'), [self.fees.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.fees.title = 'Hostel allocation'
+        self.fees.save()
+        self.appeal.delete()
+        self.assertEqual(self.search('hostel'), [self.fees.id])
+        self.assertEqual(self.search('appeal'), [])
+
+    def test_blank_search_leaves_queryset_alone(self):
+        queryset = Issue.objects.all()
+        self.assertIs(search_issues(queryset, '  '), queryset)
+
+    def test_admin_searches_usernames_and_text(self):
+        student = make_user('nakato')
+        mine = make_issue(student, title='Transcript error')
+        model_admin = admin.site._registry[Issue]
+        request = RequestFactory().get('/admin/Apps/issue/')
+
+        def search(term):
+            queryset, _ = model_admin.get_search_results(request, Issue.objects.all(), term)
+            return set(queryset.values_list('id', flat=True))
+
+        # Usernames match on any part, title and description through the index
+        self.assertEqual(search('kato'), {mine.id})
+        self.assertEqual(search('tuit'), {self.fees.id})
+        self.assertEqual(search('transcript'), {mine.id})
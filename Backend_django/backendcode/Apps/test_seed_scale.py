@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .models import User, Student, Lecturer, Issue, Notification, NotificationDelivery, LoginHistory
+from .notifications import unread_count
+
+
+class SeedScaleTests(TestCase):
+    def seed(self, **options):
+        call_command(
+            'seed_scale', students=20, lecturers=3, issues=120, notifications_per_issue=2,
+            batch_size=50, stdout=StringIO(), **options
+        )
+
+    def test_creates_consistent_rows(self):
+        self.seed()
+        self.assertEqual(Student.objects.count(), 20)
+        self.assertEqual(Lecturer.objects.count(), 3)
+        self.assertEqual(Issue.objects.count(), 120)
+        self.assertEqual(Notification.objects.count(), 240)
+        self.assertEqual(LoginHistory.objects.count(), 46)
+        self.assertFalse(Issue.objects.exclude(student__student_profile__isnull=False).exists())
+        self.assertFalse(Issue.objects.filter(assigned_to__isnull=False, assigned_to__Lecturer_profile__isnull=True).exists())
+        # Dates are spread out rather than all stamped with the time of the run
+        self.assertGreater(Issue.objects.values('reported_date').distinct().count(), 100)
+        self.assertTrue(User.objects.get(username='seed_s0').check_password('password123'))
+        for user in User.objects.filter(username__startswith='seed_'):
+            self.assertEqual(
+                unread_count(user), NotificationDelivery.objects.filter(recipient=user, is_read=False).count()
+            )
+
+    def test_same_seed_gives_same_data(self):
+        self.seed(seed=7)
+        first = list(Issue.objects.order_by('id').values_list('title', 'student__username', 'priority'))
+        self.seed(seed=7, prefix='again')
+        second = list(Issue.objects.order_by('id').values_list('title', 'student__username', 'priority'))[120:]
+        self.assertEqual(
+            [(title, username.replace('seed_', ''), priority) for title, username, priority in first],
+            [(title, username.replace('again_', ''), priority) for title, username, priority in second],
+        )
+
+    def test_refuses_to_reuse_prefix(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
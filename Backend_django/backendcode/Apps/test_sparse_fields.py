@@ -0,0 +1,46 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Status
+from .testing import make_student, make_issue, client_for
+
+
+class IssueSparseFieldsTests(TestCase):
+    def setUp(self):
+        self.user = make_student(first_name='Amina', last_name='Nanyonga')
+        make_issue(self.user, status=Status.objects.create(status_name='Open'))
+        self.client = client_for(self.user)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        issue_sql = [q['sql'] for q in ctx.captured_queries if 'FROM "Apps_issue"' in q['sql']]
+        return response.data['results'][0], issue_sql
+
+    def test_summary_projection(self):
+        row, issue_sql = self.get(reverse('api:issues-list'), {'fields': 'summary'})
+        self.assertEqual(
+            set(row), {'id', 'title', 'status', 'status_name', 'priority', 'reported_date'}
+        )
+        self.assertEqual(row['status_name'], 'Open')
+        self.assertNotIn('"description"', issue_sql[0])
+        self.assertNotIn('"Apps_user"', issue_sql[0])
+
+    def test_omit_defers_columns(self):
+        row, issue_sql = self.get(reverse('api:student_issues'), {'omit': 'description,college'})
+        self.assertNotIn('description', row)
+        self.assertNotIn('college', row)
+        self.assertEqual(row['student_name'], 'Amina Nanyonga')
+        self.assertNotIn('"Apps_issue"."description"', issue_sql[0])
+
+    def test_unknown_fields_are_ignored(self):
+        row, _ = self.get(reverse('api:issues-list'), {'fields': 'title,password'})
+        self.assertEqual(set(row), {'id', 'title'})
+
+    def test_full_rows_by_default(self):
+        row, issue_sql = self.get(reverse('api:issues-list'), {})
+        self.assertIn('description', row)
+        self.assertNotIn('search_vector', issue_sql[0])
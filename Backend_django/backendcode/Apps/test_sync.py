@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import sync
+from .models import Issue
+from .notifications import notify
+from .testing import make_user, make_admin, make_issue, client_for
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student')
+        self.other = make_user('other')
+        self.admin = make_admin()
+        self.mine = make_issue(self.student, 'Missing marks')
+        self.theirs = make_issue(self.other, 'Fees clearance')
+        self.notification = notify(self.mine, 'Issue received', 'info', [self.student])
+        self.client = client_for(self.student)
+        # Pretend every write above committed well before the sync lag window
+        self.later = timezone.now() + sync.SYNC_LAG + timedelta(seconds=1)
+
+    def sync(self, since=None):
+        params = {'since': since} if since else {}
+        with mock.patch('Apps.sync.timezone.now', return_value=self.later):
+            response = self.client.get(reverse('api:sync'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_first_sync_returns_visible_rows(self):
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['issues']], [self.mine.id])
+        self.assertEqual([row['id'] for row in data['notifications']], [self.notification.id])
+        self.assertEqual(data['deleted'], {'issues': [], 'notifications': []})
+        self.assertFalse(data['has_more'])
+
+    def test_second_sync_returns_only_changes(self):
+        since = self.sync()['since']
+        self.assertEqual(self.sync(since)['issues'], [])
+
+        self.later += timedelta(seconds=10)
+        with mock.patch('django.utils.timezone.now', return_value=self.later - sync.SYNC_LAG * 2):
+            self.mine.title = 'Missing coursework marks'
+            self.mine.save()
+        data = self.sync(since)
+        self.assertEqual([row['title'] for row in data['issues']], ['Missing coursework marks'])
+        self.assertEqual(data['notifications'], [])
+
+    def test_deletes_come_back_as_tombstones(self):
+        since = self.sync()['since']
+        self.later += timedelta(seconds=10)
+        with mock.patch('django.utils.timezone.now', return_value=self.later - sync.SYNC_LAG * 2):
+            notification_id, theirs_id = self.notification.id, self.theirs.id
+            self.notification.delete()
+            self.theirs.delete()
+        data = self.sync(since)
+        self.assertEqual(data['deleted'], {'issues': [], 'notifications': [notification_id]})
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.sync(since)['deleted']['issues'], [theirs_id])
+
+    def test_recent_rows_are_resent_until_past_the_lag(self):
+        self.later = timezone.now()
+        since = self.sync()['since']
+        self.assertEqual([row['id'] for row in self.sync(since)['issues']], [self.mine.id])
+
+    def test_pages_by_keyset(self):
+        for i in range(4):
+            make_issue(self.student, f'Issue {i}')
+        seen = []
+        since = None
+        with mock.patch.object(sync, 'SYNC_PAGE_SIZE', 2):
+            while True:
+                data = self.sync(since)
+                seen += [row['id'] for row in data['issues']]
+                since = data['since']
+                if not data['has_more']:
+                    break
+        self.assertEqual(sorted(seen), sorted(Issue.objects.filter(student=self.student).values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_rejects_garbage_token(self):
+        response = self.client.get(reverse('api:sync'), {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .blacklist import BloomFilter, blacklist_filter, COMMIT_LAG
+from .testing import make_user
+from .tokens import ClaimsRefreshToken
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'added-{i}')
+        self.assertTrue(all(f'added-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 200)
+
+
+@override_settings(BLACKLIST_FILTER_SYNC_MS=60000)
+class BlacklistCheckTests(TestCase):
+    def setUp(self):
+        self.user = make_user('student', role_name=None)
+        blacklist_filter.reset()
+        self.addCleanup(blacklist_filter.reset)
+
+    def check(self, token):
+        return ClaimsRefreshToken(str(token))
+
+    def test_clean_tokens_are_checked_without_a_query(self):
+        token, other = ClaimsRefreshToken.for_user(self.user), ClaimsRefreshToken.for_user(self.user)
+        self.check(token)
+        with self.assertNumQueries(0):
+            self.check(token)
+            self.check(other)
+
+    def test_tokens_blacklisted_here_are_refused_at_once(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        self.check(token)
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            self.check(token)
+
+    @override_settings(BLACKLIST_FILTER_SYNC_MS=0)
+    def test_tokens_blacklisted_elsewhere_are_picked_up(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        self.check(token)
+        # As another worker would: straight to the database
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        with self.assertRaises(TokenError):
+            self.check(token)
+
+    @override_settings(BLACKLIST_FILTER_SYNC_MS=0)
+    def test_watermark_stays_behind_recent_rows(self):
+        old, recent = ClaimsRefreshToken.for_user(self.user), ClaimsRefreshToken.for_user(self.user)
+        old_row = BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=old['jti']))
+        BlacklistedToken.objects.filter(id=old_row.id).update(blacklisted_at=timezone.now() - 2 * COMMIT_LAG)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=recent['jti']))
+        blacklist_filter.sync()
+        # Rows younger than COMMIT_LAG are read again until they are settled
+        self.assertEqual(blacklist_filter.watermark, old_row.id)
+
+    @override_settings(BLACKLIST_FILTER_SYNC_MS=0)
+    def test_tokens_blacklisted_here_are_counted_once(self):
+        blacklist_filter.sync()
+        ClaimsRefreshToken.for_user(self.user).blacklist()
+        blacklist_filter.sync()
+        blacklist_filter.sync()
+        self.assertEqual(blacklist_filter.loaded, 1)
+
+    @override_settings(BLACKLIST_FILTER_SYNC_MS=0, BLACKLIST_FILTER_CAPACITY=2)
+    def test_rebuild_leaves_out_expired_tokens(self):
+        blacklist_filter.sync()
+        tokens = [ClaimsRefreshToken.for_user(self.user) for _ in range(3)]
+        for token in tokens:
+            token.blacklist()
+        # Reads the three rows, one more than the filter was sized for
+        blacklist_filter.sync()
+        self.assertEqual(blacklist_filter.loaded, 3)
+        OutstandingToken.objects.filter(jti=tokens[0]['jti']).update(expires_at=timezone.now())
+        # Over capacity, so this sync starts afresh from the live rows
+        blacklist_filter.sync()
+        self.assertEqual(blacklist_filter.loaded, 2)
+        for token in tokens[1:]:
+            with self.assertRaises(TokenError):
+                self.check(token)
+
+
+class PurgeExpiredTokensTests(TestCase):
+    def test_deletes_expired_tokens_in_batches(self):
+        user = make_user('student', role_name=None)
+        tokens = [ClaimsRefreshToken.for_user(user) for _ in range(5)]
+        for token in tokens[:3]:
+            token.blacklist()
+        expired = [token['jti'] for token in tokens[1:]]
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        out = StringIO()
+        call_command('purge_expired_tokens', '--batch-size', '2', stdout=out)
+        self.assertIn('Purged 4 expired tokens', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [tokens[0]['jti']])
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, tokens[0]['jti'])
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .authentication import user_cache
+from .testing import make_role, make_user, make_student
+from .tokens import ClaimsRefreshToken
+
+
+@override_settings(LOGIN_HISTORY_FLUSH_MS=0)
+class TokenClaimsTests(TestCase):
+    def setUp(self):
+        self.user = make_student(password='secret')
+        self.student = self.user.student_profile
+        user_cache.invalidate()
+        self.addCleanup(user_cache.invalidate)
+
+    def client_for(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+    def test_login_tokens_carry_role_and_profile(self):
+        response = APIClient().post(reverse('api:api-login'), {'username': 'STUDENT', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200, response.data)
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['role'], 'student')
+        self.assertEqual(access['role_label'], 'Student')
+        self.assertEqual(access['profile'], 'student')
+        self.assertEqual(access['profile_id'], self.student.id)
+
+    def test_read_only_endpoints_do_not_read_users(self):
+        client = self.client_for(ClaimsRefreshToken.for_user(self.user).access_token)
+        for name in ('get_user_role', 'student_issues', 'get_notifications'):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(reverse(f'api:{name}'))
+            self.assertEqual(response.status_code, 200, (name, response.data))
+            tables = ('FROM "Apps_user"', 'FROM "user_roles"', 'FROM "Apps_student"')
+            self.assertFalse([q['sql'] for q in ctx.captured_queries if any(t in q['sql'] for t in tables)], name)
+        self.assertEqual(client.get(reverse('api:get_user_role')).data, {'role': 'Student'})
+
+    def test_claims_are_enforced(self):
+        lecturer = make_user('lecturer', 'lecturer')
+        client = self.client_for(ClaimsRefreshToken.for_user(lecturer).access_token)
+        self.assertEqual(client.get(reverse('api:student_issues')).status_code, 403)
+
+    def test_refresh_re_reads_the_user(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        self.user.role = make_role('admin')
+        self.user.save()
+
+        response = APIClient().post(reverse('api:token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'admin')
+        self.assertEqual(RefreshToken(response.data['refresh'])['role'], 'admin')
+
+        # The rotated-out refresh token is blacklisted
+        response = APIClient().post(reverse('api:token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_refuses_inactive_and_deleted_users(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        self.user.is_active = False
+        self.user.save()
+        response = APIClient().post(reverse('api:token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+        self.user.delete()
+        response = APIClient().post(reverse('api:token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_tokens_without_claims_use_the_database(self):
+        client = self.client_for(AccessToken.for_user(self.user))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('api:get_user_role'))
+        self.assertEqual(response.data, {'role': 'Student'})
+        self.assertTrue([q['sql'] for q in ctx.captured_queries if 'FROM "Apps_user"' in q['sql']])
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get(reverse('api:get_user_role')).status_code, 401)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import NotificationDelivery, UnreadCounter
+from .notifications import notify, mark_read, unread_count
+from .testing import make_user, make_issue, client_for
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student')
+        self.other = make_user('other')
+        self.issue = make_issue(self.student)
+
+    def test_counts_follow_notify_and_mark_read(self):
+        first = notify(self.issue, 'Submitted', 'info', [self.student, self.other])
+        notify(self.issue, 'Assigned', 'info', [self.student])
+        self.assertEqual((unread_count(self.student), unread_count(self.other)), (2, 1))
+
+        self.assertEqual(mark_read(self.student, NotificationDelivery.objects.filter(notification=first)), 1)
+        # Marking again, or marking someone else's delivery, changes nothing
+        self.assertEqual(mark_read(self.student, NotificationDelivery.objects.filter(notification=first)), 0)
+        self.assertEqual((unread_count(self.student), unread_count(self.other)), (1, 1))
+
+        first.delete()
+        self.assertEqual((unread_count(self.student), unread_count(self.other)), (1, 0))
+
+    def test_badge_endpoint_reads_one_row(self):
+        notify(self.issue, 'Submitted', 'info', [self.student])
+        client = client_for(self.student)
+        with self.assertNumQueries(1):
+            response = client.get(reverse('api:unread_count'))
+        self.assertEqual(response.data, {'unread_count': 1})
+
+    def test_viewset_patch_marks_the_callers_delivery(self):
+        notification = notify(self.issue, 'Submitted', 'info', [self.student, self.other])
+        client = client_for(self.student)
+        response = client.patch(reverse('api:notifications-detail', args=[notification.id]), {'is_read': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_read'])
+        self.assertEqual((unread_count(self.student), unread_count(self.other)), (0, 1))
+        # The shared notification stays unread for everyone else
+        notification.refresh_from_db()
+        self.assertFalse(notification.is_read)
+        response = client_for(self.other).get(reverse('api:notifications-detail', args=[notification.id]))
+        self.assertFalse(response.data['is_read'])
+
+    def test_reconcile_rebuilds_counters(self):
+        notify(self.issue, 'Submitted', 'info', [self.student, self.other])
+        notify(self.issue, 'Assigned', 'info', [self.student])
+        UnreadCounter.objects.filter(user=self.student).update(count=40)
+        UnreadCounter.objects.filter(user=self.other).delete()
+
+        out = StringIO()
+        call_command('reconcile_unread_counts', dry_run=True, stdout=out)
+        self.assertIn('1 counters out of step, 1 missing', out.getvalue())
+        self.assertEqual(unread_count(self.student), 40)
+
+        call_command('reconcile_unread_counts', stdout=StringIO())
+        self.assertEqual((unread_count(self.student), unread_count(self.other)), (2, 1))
@@ -0,0 +1,66 @@
+from rest_framework.test import APIClient
+
+from .models import User, UserRole, Student, Lecturer, Issue
+
+# Fixtures shared by the test modules. Every helper fills in the fields a test does
+# not care about, so a test only spells out what it asserts on.
+
+ISSUE_FIELDS = dict(
+    description='Coursework marks missing', college='COCIS', program='BSCS',
+    year_of_study='1', semester='1', course_unit='Programming', course_code='CSC1100',
+)
+
+# What a student posts to create_issue
+ISSUE_FORM = dict(title='Missing marks', **ISSUE_FIELDS)
+
+ROLE_LABELS = {'student': 'Student', 'lecturer': 'Lecturer', 'admin': 'Administrator'}
+
+
+def make_role(role_name):
+    role, _ = UserRole.objects.get_or_create(
+        role_name=role_name, defaults={'name': ROLE_LABELS.get(role_name, role_name.title())}
+    )
+    return role
+
+
+def make_user(username, role_name='student', **fields):
+    """A user with the given role (None for no role), password 'x' unless given"""
+    fields.setdefault('email', f'{username}@example.com')
+    fields.setdefault('password', 'x')
+    role = make_role(role_name) if role_name else None
+    return User.objects.create_user(username=username, role=role, **fields)
+
+
+def make_student(username='student', **fields):
+    """A student user with their Student profile"""
+    user = make_user(username, 'student', **fields)
+    Student.objects.create(
+        user=user, college='COCIS', student_number=f'SN-{username}',
+        registration_number=f'RN-{username}', course='BSCS'
+    )
+    return user
+
+
+def make_lecturer(username='lecturer', **fields):
+    """A lecturer user and their Lecturer profile, which is returned"""
+    fields.setdefault('email', f'{username}@mak.ac.ug')
+    user = make_user(username, 'lecturer', **fields)
+    return Lecturer.objects.create(
+        user=user, employee_id=f'EMP-{username}', department='Computer Science',
+        college='COCIS', position='Lecturer'
+    )
+
+
+def make_admin(username='registrar', role_name='admin', **fields):
+    fields.setdefault('email', f'{username}@mak.ac.ug')
+    return make_user(username, role_name, **fields)
+
+
+def make_issue(student=None, title='Missing marks', **fields):
+    return Issue.objects.create(title=title, student=student, **{**ISSUE_FIELDS, **fields})
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
@@ -0,0 +1,86 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import PROFILE_RELATIONS, USER_RELATIONS
+from .blacklist import blacklist_filter, is_blacklisted
+from .models import User
+
+# Tokens that carry the user's role and profile, so read-only endpoints can
+# authorize from the token alone (ClaimsJWTAuthentication). The claims are taken
+# from the database whenever a token pair is issued or refreshed, so a change of
+# role, a deactivation or a blacklisted refresh token takes effect within one
+# access token lifetime.
+
+
+def with_relations(user):
+    """user with role and profiles loaded, re-reading it only if they are not cached yet"""
+    if all(User._meta.get_field(name).is_cached(user) for name in USER_RELATIONS):
+        return user
+    return User.objects.select_related(*USER_RELATIONS).get(pk=user.pk)
+
+
+def user_claims(user):
+    user = with_relations(user)
+    claims = {'role': None, 'role_id': None, 'role_label': None, 'profile': None, 'profile_id': None}
+    if user.role is not None:
+        claims.update(role=user.role.role_name, role_id=user.role.id, role_label=user.role.name)
+    for kind, relation, _model in PROFILE_RELATIONS:
+        profile = getattr(user, relation, None)
+        if profile is not None:
+            claims.update(profile=kind, profile_id=profile.id)
+            break
+    return claims
+
+
+class ClaimsRefreshToken(RefreshToken):
+    # Access tokens derived from this refresh token copy its claims
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(user_claims(user))
+        return token
+
+    def check_blacklist(self):
+        # Answered by the process's Bloom filter for all but the rare hit
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        # Checks the signature, expiry and blacklist
+        refresh = self.token_class(attrs['refresh'])
+
+        user = User.objects.select_related(*USER_RELATIONS).filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_("No active account found for the given token."), 'no_active_account')
+        # Re-read rather than trusted, so the new access token reflects the user as they are now
+        refresh.payload.update(user_claims(user))
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
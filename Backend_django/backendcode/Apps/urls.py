@@ -52,6 +52,14 @@ urlpatterns = [
     
     # Notifications
     path('notifications/', get_notifications, name='get_notifications'),
+    path('notifications/stream/', notification_stream, name='notification_stream'),
+    path('notifications/stream/ticket/', notification_stream_ticket, name='notification_stream_ticket'),
+    path('notifications/unread-count/', get_unread_count, name='unread_count'),
+    path('notifications/mark-read/', mark_notifications_read, name='mark_notifications_read'),
+    path('notifications/preferences/', notification_preferences, name='notification_preferences'),
+
+    # Delta sync
+    path('sync/', sync_changes, name='sync'),
     
     # Include router URLs last to avoid conflicts
     path('', include(router.urls)),
@@ -0,0 +1,142 @@
+import hashlib
+from functools import partial, wraps
+
+from django.db import connection, transaction
+from django.db.models import DateTimeField, F, Func, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import DataVersion, NotificationDelivery, Tombstone
+
+# Conditional GETs for the issue and notification lists. Each list is validated by
+# when the rows it shows last changed: the newest updated_at among them, read off
+# the indexes the lists already use, and the newest delete tombstone. Status and
+# user names appear in every row but change rarely, so they are tracked by one
+# DataVersion counter per table instead.
+
+NAME_SCOPES = ('status', 'user')
+
+
+def bump(*scopes):
+    """
+    Record a change to each scope once the current transaction commits; call this
+    from any write that bypasses model signals. Bumping after commit keeps writers
+    from queueing on the counter rows for the length of their transactions.
+    """
+    transaction.on_commit(partial(bump_now, scopes))
+
+
+def bump_now(scopes):
+    now = timezone.now()
+    updated = DataVersion.objects.filter(scope__in=scopes).update(version=F('version') + 1, updated_at=now)
+    if updated < len(scopes):
+        DataVersion.objects.bulk_create(
+            [DataVersion(scope=scope, version=1, updated_at=now) for scope in scopes],
+            ignore_conflicts=True
+        )
+
+
+def current(scopes):
+    """Return (versions, last modified) for the given scopes in a single query"""
+    rows = DataVersion.objects.filter(scope__in=scopes).values_list('scope', 'version', 'updated_at')
+    versions = {scope: (version, updated_at) for scope, version, updated_at in rows}
+    last_modified = max((updated_at for _, updated_at in versions.values()), default=None)
+    return [versions.get(scope, (0, None))[0] for scope in scopes], last_modified
+
+
+def newest(queryset, field='updated_at'):
+    """The latest value of field among queryset's rows, as a subquery"""
+    # A bare MAX() rather than ORDER BY ... LIMIT 1, so no sort is planned where
+    # the index that narrows queryset does not also cover field
+    latest = Func(field, function='MAX', output_field=DateTimeField())
+    return Subquery(queryset.order_by().annotate(latest=latest).values('latest'))
+
+
+def shared_validators():
+    # Deletes are rare enough to share one validator across every list; the
+    # unfiltered MAX() is answered from the end of the tombstone index
+    validators = {'deletes': newest(Tombstone.objects.all(), 'deleted_at')}
+    for scope in NAME_SCOPES:
+        validators[scope] = newest(DataVersion.objects.filter(scope=scope))
+    return validators
+
+
+def issue_validators(issues):
+    """What a list of issues depends on: edits to them, deletes and names"""
+    return {'issues': newest(issues), **shared_validators()}
+
+
+def inbox_validators(user, issues=None):
+    """
+    What user's notification inbox depends on: their own deliveries (new ones and
+    ones marked read), deletes, names, and edits to the issues they can see, whose
+    titles and statuses the inbox shows.
+    """
+    validators = {
+        'deliveries': newest(NotificationDelivery.objects.filter(recipient_id=user.pk)),
+        **shared_validators(),
+    }
+    if issues is not None:
+        validators['issues'] = newest(issues)
+    return validators
+
+
+def read_validators(validators):
+    """Evaluate validators in a single SELECT, without reading any other table"""
+    subqueries = list(validators.values())
+    parts, params = [], []
+    for subquery in subqueries:
+        sql, subquery_params = subquery.query.sql_with_params()
+        parts.append(f'({sql})')
+        params.extend(subquery_params)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(parts), params)
+        row = cursor.fetchone()
+
+    # Apply the conversions the ORM would, e.g. SQLite returns datetimes as text
+    values = []
+    for value, subquery in zip(row, subqueries):
+        for converter in connection.ops.get_db_converters(subquery):
+            value = converter(value, subquery, connection)
+        values.append(value)
+    return values
+
+
+def conditional_get(get_validators):
+    """
+    Give a DRF view an ETag and Last-Modified derived from get_validators(request),
+    a dict of subqueries such as issue_validators() returns, and answer 304 Not
+    Modified before the view runs when the client is up to date.
+    Apply it below @api_view so the user is already authenticated.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            values = read_validators(get_validators(request))
+            key = '|'.join([
+                str(request.user.pk), request.get_full_path(),
+                *(value.isoformat() if value else '-' for value in values)
+            ])
+            etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+            last_modified = max((value for value in values if value), default=None)
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+
+            # Every poll revalidates, and responses differ per user
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapped
+    return decorator
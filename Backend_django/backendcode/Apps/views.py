@@ -1,17 +1,17 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status, filters, serializers
 from rest_framework.response import Response
-from django.core.mail import send_mail
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
 from django.db import transaction, IntegrityError, models
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from django.views.generic import TemplateView
+from django.utils.decorators import method_decorator
 from django.shortcuts import get_object_or_404
-from django.http import Http404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.core.exceptions import PermissionDenied
 from rest_framework.views import exception_handler
 from django.contrib.auth.hashers import make_password
@@ -21,7 +21,7 @@ import traceback
 
 from .models import (
     User, Student, Lecturer, Administrator, Issue, 
-    Notification, Status, LoginHistory, UserRole, 
+    Notification, NotificationDelivery, Status, LoginHistory, UserRole, 
     EmailVerification
 )
 from .serializer import (
@@ -29,37 +29,72 @@ from .serializer import (
     LecturerSerializer, AdministratorSerializer,
     IssueSerializer, NotificationSerializer, 
     StatusSerializer, LoginHistorySerializer, 
-    UserRoleSerializer, UserSerializer
+    UserRoleSerializer, UserSerializer, MarkReadSerializer,
+    NotificationPreferenceSerializer
 )
 from .filters import IssueFilter
+from .pagination import IssueCursorPagination, paginate_issues, paginate_issue_rows
+from .search import IssueSearchFilter
+from .events import StreamTicket, stream_token, stream_events
+from .notifications import notify, admin_ids, mark_read, unread_count
+from .mail import queue_mail, queue_admin_mail, queue_notification_mail
+from .authentication import find_login_user, ClaimsJWTAuthentication
+from .tokens import ClaimsRefreshToken
+from .logins import record_login
+from .querybudget import query_budget
+from .reference import get_status, get_role
+from .versioning import conditional_get, issue_validators, inbox_validators
+from .sync import InvalidToken, visible_issues, sync_changes as build_sync_response
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 # DRF Viewsets
 class StudentViewSet(viewsets.ModelViewSet):
-    queryset = Student.objects.all()
+    queryset = Student.objects.select_related('user__role').all()
     serializer_class = StudentSerializer
+    query_budget = 3
 
 class LecturerViewSet(viewsets.ModelViewSet):
-    queryset = Lecturer.objects.select_related('student','Lecturer').all()
+    queryset = Lecturer.objects.select_related('user__role').all()
     serializer_class = LecturerSerializer
+    query_budget = 3
 
 # ViewSet that provides full API access to Administrator objects
 class AdministratorViewSet(viewsets.ModelViewSet):
-    queryset = Administrator.objects.all()
+    queryset = Administrator.objects.select_related('user__role').all()
     serializer_class = AdministratorSerializer
+    query_budget = 3
 
 # ViewSet for managing Issue objects with authentication, filtering, search, and ordering support
 class IssueViewSet(viewsets.ModelViewSet):
-    queryset = Issue.objects.select_related('student', 'assigned_to', 'status').prefetch_related('notifications').all()
+    queryset = Issue.objects.select_related('student', 'assigned_to', 'status').all()
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IssueSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'assigned_to']
     search_fields = ['title', 'description']
     ordering_fields = ['reported_date', 'priority']
     filterset_class = IssueFilter 
+    pagination_class = IssueCursorPagination
+    query_budget = 4
+
+    @property
+    def ordering(self):
+        # Best matches first while searching, newest first otherwise
+        if IssueSearchFilter.is_searching(self.request):
+            return IssueSearchFilter.ordering
+        return IssueCursorPagination.ordering
+
+    def get_queryset(self):
+        # Honour ?fields= / ?omit= in the SQL as well as in the response
+        return IssueSerializer.project_queryset(super().get_queryset(), self.request)
+
+    @method_decorator(conditional_get(lambda request: issue_validators(Issue.objects.all())))
+    def list(self, request, *args, **kwargs):
+        # Lists are read-only, so skip model instances and render flat rows
+        queryset = self.filter_queryset(self.get_queryset())
+        return paginate_issue_rows(request, queryset, view=self)
 
     def get_permissions(self):
          # Allow anyone to create issues; require auth for all other actions
@@ -69,8 +104,23 @@ class IssueViewSet(viewsets.ModelViewSet):
 
 # ViewSet that provides full API access to Notification objects
 class NotificationViewSet(viewsets.ModelViewSet):
-    queryset = Notification.objects.all()
+    queryset = Notification.objects.select_related(
+        'issue', 'issue__student', 'issue__assigned_to', 'issue__status'
+    ).all()
     serializer_class = NotificationSerializer
+    query_budget = {'GET': 4, 'PATCH': 8, 'PUT': 8}
+
+    def perform_update(self, serializer):
+        # Read state is per recipient, so is_read never touches the shared
+        # Notification: marking read updates only the caller's own delivery
+        is_read = self.request.data.get('is_read')
+        is_read = is_read is not None and serializers.BooleanField().to_internal_value(is_read)
+        notification = serializer.save()
+        deliveries = NotificationDelivery.objects.filter(notification=notification, recipient_id=self.request.user.pk)
+        if is_read:
+            mark_read(self.request.user, deliveries)
+        # Answer with the caller's read state, as their inbox shows it
+        notification.is_read = deliveries.filter(is_read=True).exists()
 
 
 # ViewSet that provides full API access to Status objects
@@ -80,8 +130,9 @@ class StatusViewSet(viewsets.ModelViewSet):
 
 # ViewSet that provides full API access to LoginHistory objects
 class LoginHistoryViewSet(viewsets.ModelViewSet):
-    queryset = LoginHistory.objects.all()
+    queryset = LoginHistory.objects.select_related('user__role').all()
     serializer_class = LoginHistorySerializer
+    query_budget = 3
 
 # ViewSet that provides full API access to UserRole objects
 class UserRoleViewSet(viewsets.ModelViewSet):
@@ -89,7 +140,9 @@ class UserRoleViewSet(viewsets.ModelViewSet):
     serializer_class = UserRoleSerializer
 
 
+# Reads the role from the access token's claims
 @api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def get_user_role(request):
     user = request.user
@@ -122,7 +175,7 @@ def register_student(request):
     try:
         with transaction.atomic():
             # Create or get student role
-            student_role, _ = UserRole.objects.get_or_create(role_name='student')
+            student_role = get_role('student')
             
             # Add role to validated data
             data = request.data.copy()
@@ -172,16 +225,15 @@ def register_student(request):
                 
                 # Send verification email
                 try:
-                    send_mail(
+                    queue_mail(
                         'Verify your email - Student Registration',
                         f'''Welcome to the Academic Issue Tracking System!\n\nYour verification code is: {verification_code}\n\nThis code will expire in 30 minutes.''',
                         settings.EMAIL_HOST_USER,
                         [student.user.email],
-                        fail_silently=False,
                     )
                     
                     # Generate tokens
-                    refresh = RefreshToken.for_user(student.user)
+                    refresh = ClaimsRefreshToken.for_user(student.user)
                     
                     return Response({
                         'success': True,
@@ -239,7 +291,7 @@ def register_Lecturer(request):
     try:
         with transaction.atomic():
             # Ensure the lecturer role exists and inject its PK
-            lecturer_role, _ = UserRole.objects.get_or_create(role_name='lecturer')
+            lecturer_role = get_role('lecturer')
             data = request.data.copy()
             if 'user' not in data:
                 data['user'] = {}
@@ -297,16 +349,15 @@ def register_Lecturer(request):
             verification.save()
 
             # Send email
-            send_mail(
+            queue_mail(
                 'Verify your email - Lecturer Registration',
                 f"Your verification code is: {code}\nIt expires in 30 minutes.",
                 settings.EMAIL_HOST_USER,
                 [lecturer.user.email],
-                fail_silently=False
             )
 
             # Issue tokens
-            refresh = RefreshToken.for_user(lecturer.user)
+            refresh = ClaimsRefreshToken.for_user(lecturer.user)
             return Response({
                 'success': True,
                 'message': 'Lecturer registered successfully! Check your email for verification.',
@@ -414,7 +465,7 @@ def register_Lecturer(request):
                 
                 # Send verification email
                 try:
-                    send_mail(
+                    queue_mail(
                         'Verify your email - Lecturer Registration',
                         f'''Welcome to the Academic Issue Tracking System!
 
@@ -426,11 +477,10 @@ Please use this code to verify your email and activate your Lecturer account.
 ''',
                         settings.EMAIL_HOST_USER,
                         [lecturer.user.email],
-                        fail_silently=False,
                     )
                     
                     # Generate tokens
-                    refresh = RefreshToken.for_user(lecturer.user)
+                    refresh = ClaimsRefreshToken.for_user(lecturer.user)
                     
                     return Response({
                         'success': True,
@@ -483,7 +533,7 @@ def register_administrator(request):
     try:
         with transaction.atomic():
             # Ensure the administrator role exists and inject its PK
-            admin_role, _ = UserRole.objects.get_or_create(role_name='admin')
+            admin_role = get_role('admin')
             data = request.data.copy()
             if 'user' not in data:
                 data['user'] = {}
@@ -534,7 +584,7 @@ def register_administrator(request):
 
             # Send verification email
             try:
-                send_mail(
+                queue_mail(
                     'Verify your email - Admin Registration',
                     f"""Welcome to the Academic Issue Tracking System!
 
@@ -548,14 +598,13 @@ Please use this code to verify your email and activate your administrator accoun
 """,
                     settings.EMAIL_HOST_USER,
                     [administrator.user.email],
-                    fail_silently=False,
                 )
             except Exception as e:
                 logger.error("Failed to send verification email: %s", str(e))
                 raise
 
             # Generate tokens
-            refresh = RefreshToken.for_user(administrator.user)
+            refresh = ClaimsRefreshToken.for_user(administrator.user)
             return Response({
                 'success': True,
                 'message': 'Administrator registered successfully! Check your email for verification.',
@@ -608,14 +657,9 @@ def login_view(request):
             x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
             ip = x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR') or '127.0.0.1'
 
-            # ✅ Add session_time
-            LoginHistory.objects.create(
-                user=user,
-                ip_address=ip,
-                session_time=timezone.now()
-            )
+            record_login(user, ip)
 
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
 
             return Response({
                 'success': True,
@@ -666,15 +710,13 @@ def reset_password(request):
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)   
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def issue_list(request):
-    issues = Issue.objects.all()
-    serializer = IssueSerializer(issues, many=True)
-    return Response(serializer.data)
+# issues/ is routed ahead of the router, so serve it with the viewset's list action
+# to keep filtering, full text search and pagination in one place
+issue_list = IssueViewSet.as_view({'get': 'list'})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def create_issue(request):
     try:
         # Check if user is a student
@@ -685,26 +727,25 @@ def create_issue(request):
         issue_data = request.data.copy()
         issue_data['student'] = request.user.id
         
-        # Create initial status
-        initial_status, _ = Status.objects.get_or_create(status_name='Open')
-        issue_data['status'] = initial_status.id
-
         serializer = IssueSerializer(data=issue_data)
         if serializer.is_valid():
-            issue = serializer.save()
+            # Passed to save() so the serializer does not look the status up again
+            issue = serializer.save(status=get_status('Open'))
             
             # Create notification for admin
-            admin_notification = Notification.objects.create(
-                issue=issue,
-                message=f'New academic issue submitted: {issue.title}',
-                notification_type='info'
+            admin_notification = notify(
+                issue,
+                f'New academic issue submitted: {issue.title}',
+                'info',
+                admin_ids()
             )
             
             # Create notification for student
-            student_notification = Notification.objects.create(
-                issue=issue,
-                message=f'Your issue "{issue.title}" has been submitted successfully',
-                notification_type='info'
+            student_notification = notify(
+                issue,
+                f'Your issue "{issue.title}" has been submitted successfully',
+                'info',
+                [request.user]
             )
             
             # Email student confirmation
@@ -720,18 +761,17 @@ Status: Pending
 You will receive notifications as your issue is processed.
 You can track the status of your issue in the Academic Issue Tracking System.
 '''
-            send_mail(
+            queue_notification_mail(
+                request.user,
                 'Issue Submitted Successfully',
                 student_email,
                 settings.EMAIL_HOST_USER,
-                [request.user.email],
-                fail_silently=False,
             )
             
             # Email admins about new issue
-            admins = User.objects.filter(role__role_name='administrator')
-            for admin in admins:
-                admin_email = f'''Hello {admin.get_full_name()},
+            queue_admin_mail(
+                'New Academic Issue Submitted',
+                lambda name: f'''Hello {name},
 
 A new academic issue has been submitted:
 
@@ -741,14 +781,9 @@ Priority: {issue.priority}
 Description: {issue.description}
 
 Please review and assign this issue to an appropriate lecturer.
-'''
-                send_mail(
-                    'New Academic Issue Submitted',
-                    admin_email,
-                    settings.EMAIL_HOST_USER,
-                    [admin.email],
-                    fail_silently=False,
-                )
+''',
+                settings.EMAIL_HOST_USER,
+            )
             
             logger.info(f"Issue created: {issue.title} by {request.user.username}")
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -763,6 +798,8 @@ Please review and assign this issue to an appropriate lecturer.
         )
 
     except Exception as e:
+        # The error is answered rather than raised, so undo the partial work by hand
+        transaction.set_rollback(True)
         return Response(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -770,8 +807,8 @@ Please review and assign this issue to an appropriate lecturer.
   
 #View for updating an existing issue
 @api_view(['PUT'])
-def update_issue(request, issue_id):
-    issue = get_object_or_404(Issue, id=issue_id)
+def update_issue(request, pk):
+    issue = get_object_or_404(Issue, id=pk)
     serializer = IssueSerializer(issue, data=request.data)
     if serializer.is_valid():
         serializer.save()
@@ -780,8 +817,8 @@ def update_issue(request, issue_id):
 
 #View for deleting an issue
 @api_view(['DELETE'])
-def delete_issue(request, issue_id):
-    issue = get_object_or_404(Issue, id=issue_id)
+def delete_issue(request, pk):
+    issue = get_object_or_404(Issue, id=pk)
     issue.delete()
     return Response({"message":"Issue deleted successfully"}, status=204)
 
@@ -802,6 +839,7 @@ def update_student(request, student_id):
         return Response(serializer.data)
     return Response(serializer.errors, status=400)
 
+@query_budget(3)
 @api_view(['GET'])
 def filter_issues(request):
     try:
@@ -809,13 +847,15 @@ def filter_issues(request):
         issues_qs = Issue.objects.all()
         if status_param:
             issues_qs = issues_qs.filter(status=status_param)
-        serializer = IssueSerializer(issues_qs, many=True)
-        return Response(serializer.data)
+        return paginate_issue_rows(request, issues_qs)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(5)
 @api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@conditional_get(lambda request: inbox_validators(request.user, visible_issues(request.user)))
 def get_notifications(request):
     try:
         user = request.user
@@ -833,37 +873,27 @@ def get_notifications(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        role = user.role.role_name.lower()  # Convert to lowercase for consistent comparison
-        
-        # Base queryset with select_related for better performance
-        notifications = Notification.objects.select_related(
-            'issue', 
-            'issue__student', 
-            'issue__assigned_to',
-            'issue__status'
-        ).prefetch_related(
-            'issue__notifications'
-        )
-        
-        # Query notifications based on role
-        if role == 'student':
-            # Get notifications for issues reported by this student
-            notifications = notifications.filter(issue__student=user)
-        elif role == 'lecturer':
-            # Get notifications for issues assigned to this lecturer
-            notifications = notifications.filter(issue__assigned_to=user)
-        elif role in ['administrator', 'admin']:
-            # Admins see all notifications, no filter needed
-            pass
-        else:
-            return Response(
-                {"error": f"Invalid user role: {role}"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # The inbox is the user's own delivery rows, read newest first straight off
+        # the (recipient, created_at) index; ?unread=1 narrows it to unread ones
+        deliveries = NotificationDelivery.objects.filter(recipient_id=user.pk)
+        if request.GET.get('unread') in ('1', 'true'):
+            deliveries = deliveries.filter(is_read=False)
 
         try:
-            # Order by created_at and limit to recent notifications
-            notifications = notifications.order_by('-created_at')[:100]
+            # The 100 notifications themselves are then fetched by primary key
+            deliveries = deliveries.order_by('-created_at', '-id').prefetch_related(
+                Prefetch('notification', queryset=Notification.objects.select_related(
+                    'issue', 
+                    'issue__student', 
+                    'issue__assigned_to',
+                    'issue__status'
+                ))
+            )[:100]
+            notifications = []
+            for delivery in deliveries:
+                # Read state belongs to the recipient, not the shared notification
+                delivery.notification.is_read = delivery.is_read
+                notifications.append(delivery.notification)
             serializer = NotificationSerializer(notifications, many=True)
             return Response(serializer.data)
             
@@ -891,6 +921,86 @@ def get_notifications(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+#View for the notification badge: one primary key read of the user's counter
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_unread_count(request):
+    return Response({'unread_count': unread_count(request.user)})
+
+#View for marking many notifications read at once. A single UPDATE over the
+#caller's own deliveries, so nobody can touch another user's read state
+@query_budget(6)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_notifications_read(request):
+    serializer = MarkReadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    updated = mark_read(request.user, serializer.filter(NotificationDelivery.objects.all()))
+    return Response({'updated': updated, 'unread_count': unread_count(request.user)})
+
+#View for how the user's notification emails arrive: one per event or as a digest
+@query_budget(4)
+@api_view(['GET', 'PUT', 'PATCH'])
+@permission_classes([IsAuthenticated])
+def notification_preferences(request):
+    if request.method == 'GET':
+        return Response(NotificationPreferenceSerializer(request.user).data)
+    serializer = NotificationPreferenceSerializer(
+        request.user, data=request.data, partial=request.method == 'PATCH'
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer.save()
+    return Response(serializer.data)
+
+#Ticket for opening the notification stream from a browser, whose EventSource
+#cannot send the access token in a header: GET notifications/stream/?ticket=...
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def notification_stream_ticket(request):
+    return Response({'ticket': str(StreamTicket.for_access_token(request.auth))})
+
+#Server-Sent Events stream of the user's new notifications, served over ASGI.
+#Plain async view: authenticates with the SimpleJWT access token or a stream
+#ticket and resumes after the Last-Event-ID the browser sends when it reconnects.
+async def notification_stream(request):
+    token = stream_token(request)
+    if token is None:
+        return JsonResponse({'error': 'A valid access token or stream ticket is required'}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid Last-Event-ID'}, status=400)
+
+    response = StreamingHttpResponse(
+        stream_events(token, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+#View for delta sync: everything the user can see that changed since the given token
+@query_budget(6)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    user = request.user
+    if not user.role or visible_issues(user) is None:
+        return Response(
+            {'error': 'User role not configured properly'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        return Response(build_sync_response(request, user, request.GET.get('since')))
+    except InvalidToken as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 def serve_home_page(request):
     try:
@@ -978,7 +1088,7 @@ def verify_email(request):
         user.save()
 
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
 
         return Response({
             'success': True,
@@ -998,11 +1108,12 @@ def verify_email(request):
 # Apps/views.py
 
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from django.utils import timezone
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from django.contrib.auth.models import update_last_login
 from .models import LoginHistory
 
 User = get_user_model()
@@ -1011,48 +1122,45 @@ class EmailOrUsernameTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Allow users to log in with either their username or their email address.
     """
+    token_class = ClaimsRefreshToken
 
     def validate(self, attrs):
         login_input = attrs.get(self.username_field)
         password    = attrs.get('password')
 
         # 1. Find the user by username *or* email (case-insensitive)
-        try:
-            user_obj = User.objects.get(
-                Q(username__iexact=login_input) |
-                Q(email__iexact=login_input)
-            )
-        except User.DoesNotExist:
+        user_obj = find_login_user(login_input)
+        if user_obj is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            User().set_password(password)
             raise AuthenticationFailed(
                 'No active account found with the given credentials',
                 'no_active_account'
             )
 
-        # 2. Check password
-        if not user_obj.check_password(password):
+        # 2. Check password. This is the only hash per login: the token is issued
+        #    below rather than by super().validate(), which would authenticate again
+        if not user_obj.check_password(password) or not jwt_settings.USER_AUTHENTICATION_RULE(user_obj):
             raise AuthenticationFailed(
                 'No active account found with the given credentials',
                 'no_active_account'
             )
 
-        # 3. “Prime” attrs so super().validate() sees the correct username
-        attrs[self.username_field] = getattr(user_obj, self.username_field)
-
-        # 4. Call the parent to do the real token creation
-        data = super().validate(attrs)
+        # 3. Issue the token pair
+        self.user = user_obj
+        refresh = self.get_token(user_obj)
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user_obj)
 
-        # 5. Record login history
+        # 4. Record login history, buffered so the login does not wait on the insert
         request = self.context['request']
         ip = (
             request.META.get('HTTP_X_FORWARDED_FOR', '')
             .split(',')[0] or
             request.META.get('REMOTE_ADDR', '127.0.0.1')
         )
-        LoginHistory.objects.create(
-            user=user_obj,
-            ip_address=ip,
-            session_time=timezone.now(),
-        )
+        record_login(user_obj, ip)
 
         return data
 
@@ -1063,34 +1171,38 @@ class EmailOrUsernameTokenObtainPairView(TokenObtainPairView):
 # --- ADMIN: Assign Issue to Lecturer ---
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def assign_issue_to_lecturer(request):
     if not hasattr(request.user, 'role') or request.user.role.role_name.lower() != 'admin':
         return Response({'error': 'Only admin can assign issues.'}, status=403)
     issue_id = request.data.get('issue_id')
     lecturer_id = request.data.get('lecturer_id')
     try:
-        issue = Issue.objects.get(id=issue_id)
+        # The old status comes with the issue rather than in a query of its own
+        issue = Issue.objects.select_related('status').get(id=issue_id)
         lecturer = Lecturer.objects.get(id=lecturer_id)
         issue.assigned_to = lecturer.user
         
         # Update status
-        status_obj, _ = Status.objects.get_or_create(status_name='Assigned')
+        status_obj = get_status('Assigned')
         old_status = issue.status
         issue.status = status_obj
         issue.save()
         
         # Create notification for lecturer
-        Notification.objects.create(
-            issue=issue,
-            message=f'You have been assigned a new issue: {issue.title}',
-            notification_type='info'
+        notify(
+            issue,
+            f'You have been assigned a new issue: {issue.title}',
+            'info',
+            [lecturer.user]
         )
         
         # Create notification for student about assignment
-        Notification.objects.create(
-            issue=issue,
-            message=f'Your issue "{issue.title}" has been assigned to {lecturer.user.get_full_name()}',
-            notification_type='info'
+        notify(
+            issue,
+            f'Your issue "{issue.title}" has been assigned to {lecturer.user.get_full_name()}',
+            'info',
+            [issue.student_id]
         )
         
         # Email lecturer
@@ -1104,12 +1216,11 @@ Description: {issue.description}
 
 Please log in to the Academic Issue Tracking System to review and resolve this issue.
 '''
-        send_mail(
+        queue_notification_mail(
+            lecturer.user,
             'New Academic Issue Assigned',
             lecturer_email,
             settings.EMAIL_HOST_USER,
-            [lecturer.user.email],
-            fail_silently=False,
         )
         
         # Email student about assignment
@@ -1120,20 +1231,21 @@ The issue status has been updated from "{old_status}" to "Assigned".
 
 You can track the progress of your issue in the Academic Issue Tracking System.
 '''
-        send_mail(
+        queue_notification_mail(
+            issue.student,
             'Issue Update: Assigned to Lecturer',
             student_email,
             settings.EMAIL_HOST_USER,
-            [issue.student.email],
-            fail_silently=False,
         )
         return Response({'success': True, 'message': 'Issue assigned to lecturer.'})
     except Exception as e:
+        transaction.set_rollback(True)
         return Response({'error': str(e)}, status=400)
 
 # --- LECTURER: Update Issue Status ---
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def update_issue_status(request):
     issue_id = request.data.get('issue_id')
     new_status = request.data.get('status')
@@ -1141,7 +1253,7 @@ def update_issue_status(request):
     attachments = request.data.get('attachments', [])
     
     try:
-        issue = Issue.objects.get(id=issue_id)
+        issue = Issue.objects.select_related('status').get(id=issue_id)
         
         # Only assigned lecturer can update
         if issue.assigned_to != request.user:
@@ -1152,7 +1264,7 @@ def update_issue_status(request):
         old_status = issue.status.status_name if issue.status else 'Unknown'
         
         # Create or get status object
-        status_obj, _ = Status.objects.get_or_create(status_name=new_status)
+        status_obj = get_status(new_status)
         issue.status = status_obj
         issue.save()
         
@@ -1166,10 +1278,11 @@ def update_issue_status(request):
             notification_type = 'info'
             
         # Create notification for student
-        Notification.objects.create(
-            issue=issue,
-            message=f'Your issue "{issue.title}" status has been updated to {new_status}.\n\nNotes: {resolution_notes}',
-            notification_type=notification_type
+        notify(
+            issue,
+            f'Your issue "{issue.title}" status has been updated to {new_status}.\n\nNotes: {resolution_notes}',
+            notification_type,
+            [issue.student_id]
         )
         
         # Email student with detailed update
@@ -1201,28 +1314,26 @@ Next Steps:
 You can view the full details and track this issue's progress in the Academic Issue Tracking System.
 """
         
-        send_mail(
+        queue_notification_mail(
+            issue.student,
             f'Issue Update: {issue.title}',
             email_content,
             settings.EMAIL_HOST_USER,
-            [issue.student.email],
-            fail_silently=False,
         )
         
         # If issue is resolved or closed, notify admin
         if new_status.lower() in ['resolved', 'closed']:
-            admin_notification = Notification.objects.create(
-                issue=issue,
-                message=f'Issue "{issue.title}" has been {new_status.lower()} by {request.user.get_full_name()}',
-                notification_type='info'
+            admin_notification = notify(
+                issue,
+                f'Issue "{issue.title}" has been {new_status.lower()} by {request.user.get_full_name()}',
+                'info',
+                admin_ids()
             )
             
             # Notify admins via email
-            admins = User.objects.filter(role__role_name='administrator')
-            for admin in admins:
-                send_mail(
-                    f'Issue {new_status}: {issue.title}',
-                    f"""Hello {admin.get_full_name()},
+            queue_admin_mail(
+                f'Issue {new_status}: {issue.title}',
+                lambda name: f"""Hello {name},
 
 The following academic issue has been {new_status.lower()}:
 
@@ -1235,10 +1346,8 @@ Resolution Notes:
 
 You can review the details in the Academic Issue Tracking System.
 """,
-                    settings.EMAIL_HOST_USER,
-                    [admin.email],
-                    fail_silently=False,
-                )
+                settings.EMAIL_HOST_USER,
+            )
         
         return Response({
             'success': True,
@@ -1250,38 +1359,66 @@ You can review the details in the Academic Issue Tracking System.
         return Response({'error': 'Issue not found'}, status=404)
     except Exception as e:
         logger.error(f"Error updating issue status: {str(e)}")
+        transaction.set_rollback(True)
         return Response({'error': str(e)}, status=500)
 
 # --- STUDENT: List Own Issues (Issue Tracking) ---
+@query_budget(5)
 @api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@conditional_get(lambda request: issue_validators(Issue.objects.filter(student_id=request.user.pk)))
 def student_issues(request):
     try:
         # Verify user is a student
         if not hasattr(request.user, 'student_profile'):
             return Response({'error': 'Only students can view their issues.'}, status=403)
         
-        # Get all issues for the student with related fields
-        issues = Issue.objects.select_related('status', 'assigned_to').filter(
-            student=request.user
-        ).order_by('-reported_date')
+        # Get the student's issues with related fields, one cursor page at a time
+        issues = IssueSerializer.project_queryset(
+            Issue.objects.select_related('student', 'status', 'assigned_to'), request
+        ).filter(student_id=request.user.pk)
 
-        serializer = IssueSerializer(issues, many=True)
-        return Response(serializer.data)
+        return paginate_issues(request, issues, IssueSerializer)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
 # --- ADMIN: Statistics Endpoint ---
+@query_budget(8)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def admin_statistics(request):
+    # Checked before the conditional GET, so only admins can learn whether the data changed
     if not hasattr(request.user, 'role') or request.user.role.role_name.lower() != 'admin':
         return Response({'error': 'Only admin can view statistics.'}, status=403)
+    return issue_statistics(request)
+
+@conditional_get(lambda request: issue_validators(Issue.objects.all()))
+def issue_statistics(request):
     total_issues = Issue.objects.count()
-    by_status = Issue.objects.values('status__status_name').annotate(count=models.Count('id'))
-    by_lecturer = Issue.objects.values('assigned_to__username').annotate(count=models.Count('id'))
+
+    # Group on the foreign key columns so each count is answered from the issue
+    # indexes alone, then resolve the handful of names from the small lookup tables
+    status_counts = Issue.objects.order_by().values_list('status').annotate(count=models.Count('id'))
+    status_names = dict(Status.objects.values_list('id', 'status_name'))
+    by_status = {}
+    for status_id, count in status_counts:
+        name = status_names.get(status_id)
+        by_status[name] = by_status.get(name, 0) + count
+
+    lecturer_counts = Issue.objects.order_by().values_list('assigned_to').annotate(count=models.Count('id'))
+    lecturer_counts = list(lecturer_counts)
+    usernames = dict(User.objects.filter(
+        id__in=[user_id for user_id, _ in lecturer_counts if user_id is not None]
+    ).values_list('id', 'username'))
+
     return Response({
         'total_issues': total_issues,
-        'issues_by_status': list(by_status),
-        'issues_by_lecturer': list(by_lecturer),
+        'issues_by_status': [
+            {'status__status_name': name, 'count': count} for name, count in by_status.items()
+        ],
+        'issues_by_lecturer': [
+            {'assigned_to__username': usernames.get(user_id), 'count': count}
+            for user_id, count in lecturer_counts
+        ],
     })
@@ -62,8 +62,64 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Apps.querybudget.QueryBudgetMiddleware',
 ]
 
+# Query budgets, checked with DEBUG, QUERY_BUDGET_ENABLED or QUERY_BUDGET_STRICT on:
+# a SQL shape repeated this many times in one request is logged as a likely N+1;
+# QUERY_BUDGET_STRICT raises instead of logging when a view goes over
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 5
+QUERY_BUDGET_ENABLED = False
+QUERY_BUDGET_STRICT = False
+
+# Live notification stream (Apps/events.py): seconds between keep-alive comments,
+# and whether to fan events out across workers with PostgreSQL LISTEN/NOTIFY
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_STREAM_RELAY = True
+
+# manage.py compact_notifications archives fully read notifications older than this
+NOTIFICATION_RETENTION_DAYS = 365
+
+# manage.py run_mail_worker retries a failed email after EMAIL_OUTBOX_RETRY_DELAY
+# seconds, doubling up to EMAIL_OUTBOX_MAX_RETRY_DELAY, and gives up after
+# EMAIL_OUTBOX_MAX_ATTEMPTS failed sends
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+# Send announcements to all administrators as one blind-copied message instead
+# of one personal message each
+EMAIL_FAN_OUT_BCC = False
+
+# LoginHistory rows are buffered in each worker and written in bulk every
+# LOGIN_HISTORY_BATCH_SIZE rows or LOGIN_HISTORY_FLUSH_MS milliseconds (0 writes
+# each login immediately). Past LOGIN_HISTORY_MAX_BUFFER rows logins write their own.
+LOGIN_HISTORY_BATCH_SIZE = 200
+LOGIN_HISTORY_FLUSH_MS = 500
+LOGIN_HISTORY_MAX_BUFFER = 5000
+
+# Authenticated users (with role and profiles) are cached per process for
+# AUTH_USER_CACHE_TTL seconds, at most AUTH_USER_CACHE_SIZE of them; 0 disables it.
+# Reads may see a deactivation or role change made on another worker that late;
+# writes always check is_active and the role against the database.
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_SIZE = 10000
+
+# Refresh-token blacklist checks go through a per-process Bloom filter (sized for
+# BLACKLIST_FILTER_CAPACITY tokens at BLACKLIST_FILTER_ERROR_RATE false positives)
+# that reads tokens blacklisted by other workers every BLACKLIST_FILTER_SYNC_MS.
+# The default of 0 reads them before every check, so it saves no queries over a
+# plain blacklist lookup, only a cheaper one; a positive value makes checks
+# query-free but lets a refresh token blacklisted on another worker be used here
+# for up to that long.
+# manage.py purge_expired_tokens --every 3600 keeps the token tables trimmed.
+BLACKLIST_FILTER_SYNC_MS = 0
+BLACKLIST_FILTER_CAPACITY = 100000
+BLACKLIST_FILTER_ERROR_RATE = 0.001
+
+# Status and UserRole rows are held in memory per process (Apps/reference.py);
+# other workers' edits are noticed within REFERENCE_DATA_CHECK_MS
+REFERENCE_DATA_CHECK_MS = 5000
+
 # CORS and CSRF Configuration for local development
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -144,6 +200,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backendcode.wsgi.application'
+# The notification stream needs an ASGI server (e.g. uvicorn backendcode.asgi:application)
 
 
 # Database
@@ -230,7 +287,7 @@ AUTH_USER_MODEL = "Apps.User"
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Apps.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Allow registration endpoints to be accessible
@@ -254,6 +311,10 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Tokens carry the user's role and profile (Apps/tokens.py), re-read from the
+    # database on every refresh
+    'TOKEN_OBTAIN_SERIALIZER': 'Apps.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'Apps.tokens.ClaimsTokenRefreshSerializer',
 }
 
 
@@ -2,10 +2,21 @@
 // Axios instance configured in apiConfig.js with baseURL and auth interceptors
 import api from './apiConfig';
 
+// Issue lists are cursor paginated ({ next, previous, results }): follow next
+// until the last page and return every issue as one array
+export const fetchAllPages = async url => {
+  const items = [];
+  let next = url;
+  while (next) {
+    const response = await api.get(next);
+    items.push(...response.data.results);
+    next = response.data.next;
+  }
+  return items;
+};
+
 // Fetch all issues (list)
-export const fetchIssues = () =>
-  axios.get(`${API_URL}issues/`);
-  api.get('issues/');
+export const fetchIssues = () => fetchAllPages('issues/');
 
 // Create a new issue
 export const createIssue = async issueData => {
@@ -28,7 +39,7 @@ export const createIssue = async issueData => {
 
 // Fetch issues for the current student (if your backend filters by user)
 export const getStudentIssues = () =>
-  api.get('issues/'); // Add query params if needed, e.g. `?student=<id>`
+  fetchAllPages('issues/'); // Add query params if needed, e.g. `?student=<id>`
 
 // Assign an issue to a lecturer
 export const assignIssue = (issueId, lecturerId) =>
@@ -90,8 +101,7 @@ export const fetchStudentIssues = async () => {
   const token = localStorage.getItem('access_token');
   console.log('[fetchStudentIssues] Access token:', token);
   try {
-    const response = await api.get('student/issues/');
-    return response.data;
+    return await fetchAllPages('student/issues/');
   } catch (err) {
     console.error('[fetchStudentIssues] Error details:', err, err?.response);
     throw err;
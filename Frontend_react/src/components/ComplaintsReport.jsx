@@ -11,13 +11,20 @@ const ComplaintsReport = () => {
     const fetchComplaints = async () => {
       try {
         const token = localStorage.getItem('access_token');
-        const response = await axios.get("http://127.0.0.1:8000/api/issues/", {
-          headers: {
-            'Authorization': `Bearer ${token}`
-          }
-        });
-        console.log("Fetched complaints:", response.data); // Debugging
-        setComplaints(response.data);
+        // The list is cursor paginated: collect every page's results
+        const issues = [];
+        let next = "http://127.0.0.1:8000/api/issues/";
+        while (next) {
+          const response = await axios.get(next, {
+            headers: {
+              'Authorization': `Bearer ${token}`
+            }
+          });
+          issues.push(...response.data.results);
+          next = response.data.next;
+        }
+        console.log("Fetched complaints:", issues); // Debugging
+        setComplaints(issues);
       } catch (err) {
         console.error("Failed to fetch complaints:", err);
       }
@@ -1,13 +1,13 @@
 import React, { useEffect, useState } from "react";
 import "../styles/lecturerIssueList.css";
-import api from "../api/apiConfig";
+import { fetchAllPages } from "../api/issueService";
 
 const LecturerIssueList = ({ onSelectIssue }) => {
   const [issues, setIssues] = useState([]);
 
   useEffect(() => {
-    api.get('issues/?assigned_to=me')
-      .then(res => setIssues(res.data))
+    fetchAllPages('issues/?assigned_to=me')
+      .then(setIssues)
       .catch(() => setIssues([]));
   }, []);
 
@@ -9,8 +9,8 @@ const ComplaintsReport = () => {
   useEffect(() => {
     const loadIssues = async () => {
       try {
-        const data = await fetchIssues(); // This should return issue data array
-        setIssues(data); // Adjust this if fetchIssues returns `data.issues` instead
+        const data = await fetchIssues(); // Every page of the issue list, as one array
+        setIssues(data);
       } catch (err) {
         console.error('Failed to fetch issues:', err);
         setError('Failed to load issues');